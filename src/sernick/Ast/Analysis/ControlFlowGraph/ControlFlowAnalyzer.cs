@@ -99,10 +99,9 @@ public static class ControlFlowAnalyzer
             valToReturn = resultVariable.GenerateValueRead();
         }
 
-        var prologue = currentFunctionContext.GeneratePrologue();
         var epilogue = currentFunctionContext.GenerateEpilogue(valToReturn);
 
-        prologue[^1].NextTree = functionDefinition.Body.Accept(visitor,
+        var body = functionDefinition.Body.Accept(visitor,
             new ControlFlowVisitorParam(
                 epilogue[0],
                 null,
@@ -113,6 +112,10 @@ public static class ControlFlowAnalyzer
                 false
             ));
 
+        // The prologue is generated last, as it depends on which outer variables are accessed in the body
+        var prologue = currentFunctionContext.GeneratePrologue();
+        prologue[^1].NextTree = body;
+
         return prologue[0];
     }
 
@@ -1,5 +1,6 @@
 namespace sernick.CodeGeneration.InstructionSelection;
 
+using System.Collections.Immutable;
 using System.Diagnostics.CodeAnalysis;
 using Compiler.Function;
 using ControlFlowGraph.CodeTree;
@@ -58,6 +59,13 @@ public abstract record CodeTreePattern : CodeTreePatternBase
         [NotNullWhen(true)] out IEnumerable<CodeTreeValueNode>? leaves,
         IDictionary<CodeTreePattern, object> values);
 
+    /// <summary>
+    /// Cheap check whether this pattern could match a tree rooted at <see cref="root"/>.
+    /// Looks only at the kind of <see cref="root"/> and, for operator nodes, at its operation,
+    /// so the result is the same for all nodes with the same <see cref="CodeTreePatternRuleIndex"/> key.
+    /// </summary>
+    public abstract bool MatchesRootKind(CodeTreeNode root);
+
     /// <summary>
     /// Predicate applied to code tree nodes contents during matching.
     /// <paramref name="matchedValues"/> allows for interdependent conditions
@@ -166,6 +174,10 @@ public abstract record CodeTreePattern : CodeTreePatternBase
                    Right.TryMatch(node.Right, out var rightLeaves, values) &&
                    Run(leaves = leftLeaves.Concat(rightLeaves));
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) =>
+            root is BinaryOperationNode node &&
+            Operation.Invoke(node.Operation, ImmutableDictionary<CodeTreePattern, BinaryOperation>.Empty);
     }
 
     private sealed record UnaryOperationNodePattern(CodeTreePredicate<UnaryOperation> Operation, CodeTreePattern Operand) : CodeTreePattern
@@ -180,6 +192,10 @@ public abstract record CodeTreePattern : CodeTreePatternBase
                    Run(values[this] = node.Operation) &&
                    Operand.TryMatch(node.Operand, out leaves, values);
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) =>
+            root is UnaryOperationNode node &&
+            Operation.Invoke(node.Operation, ImmutableDictionary<CodeTreePattern, UnaryOperation>.Empty);
     }
 
     private sealed record ConstantPattern(CodeTreePredicate<RegisterValue> Value) : CodeTreePattern
@@ -193,6 +209,8 @@ public abstract record CodeTreePattern : CodeTreePatternBase
                    Value.Invoke(node.Value, values.ValuesOfType<RegisterValue, CodeTreePattern, object>()) &&
                    Run(values[this] = node.Value);
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) => root is Constant;
     }
 
     private sealed record RegisterReadPattern(CodeTreePredicate<Register> Register) : CodeTreePattern
@@ -206,6 +224,8 @@ public abstract record CodeTreePattern : CodeTreePatternBase
                    Register.Invoke(node.Register, values.ValuesOfType<Register, CodeTreePattern, object>()) &&
                    Run(values[this] = node.Register);
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) => root is RegisterRead;
     }
 
     private sealed record RegisterWritePattern(CodeTreePredicate<Register> Register, CodeTreePattern Value) : CodeTreePattern
@@ -220,6 +240,8 @@ public abstract record CodeTreePattern : CodeTreePatternBase
                    Run(values[this] = node.Register) &&
                    Value.TryMatch(node.Value, out leaves, values);
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) => root is RegisterWrite;
     }
 
     private sealed record GlobalAddressPattern : CodeTreePattern
@@ -232,6 +254,8 @@ public abstract record CodeTreePattern : CodeTreePatternBase
             return root is GlobalAddress node &&
                    Run(values[this] = node.Label);
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) => root is GlobalAddress;
     }
 
     private sealed record MemoryReadPattern(CodeTreePattern MemoryLocation) : CodeTreePattern
@@ -244,6 +268,8 @@ public abstract record CodeTreePattern : CodeTreePatternBase
             return root is MemoryRead node &&
                    MemoryLocation.TryMatch(node.MemoryLocation, out leaves, values);
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) => root is MemoryRead;
     }
 
     private sealed record MemoryWritePattern(CodeTreePattern MemoryLocation, CodeTreePattern Value) : CodeTreePattern
@@ -258,6 +284,8 @@ public abstract record CodeTreePattern : CodeTreePatternBase
                    Value.TryMatch(node.Value, out var leavesValue, values) &&
                    Run(leaves = leavesLocation.Concat(leavesValue));
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) => root is MemoryWrite;
     }
 
     private sealed record FunctionCallPattern : CodeTreePattern
@@ -270,6 +298,8 @@ public abstract record CodeTreePattern : CodeTreePatternBase
             return root is FunctionCall node &&
                    Run(values[this] = node.FunctionCaller);
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) => root is FunctionCall;
     }
 
     private sealed record FunctionReturnPattern : CodeTreePattern
@@ -281,6 +311,8 @@ public abstract record CodeTreePattern : CodeTreePatternBase
             leaves = Enumerable.Empty<CodeTreeValueNode>();
             return root is FunctionReturn;
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) => root is FunctionReturn;
     }
 
     private sealed record WildcardNodePattern : CodeTreePattern
@@ -298,6 +330,8 @@ public abstract record CodeTreePattern : CodeTreePatternBase
             leaves = rootValue.Enumerate();
             return true;
         }
+
+        public override bool MatchesRootKind(CodeTreeNode root) => root is CodeTreeValueNode;
     }
 
     // hack method, which allows to treat assignments as "true" values
@@ -18,8 +18,8 @@ public sealed record ConditionalJumpNodePatternRule(
 {
     public delegate IEnumerable<IInstruction> GenerateInstructionsDelegate(
         Register input,
-        Label trueCase,
-        Label falseCase);
+        Label? trueCase,
+        Label? falseCase);
 }
 
 public sealed record SingleExitNodePatternRule(
@@ -0,0 +1,48 @@
+namespace sernick.CodeGeneration.InstructionSelection;
+
+using ControlFlowGraph.CodeTree;
+
+/// <summary>
+/// Groups covering rules by the kind of code tree node they can be rooted at,
+/// so that matching a node only tries rules which have a chance to succeed.
+/// The key of a node is its type and, for <see cref="BinaryOperationNode"/> and <see cref="UnaryOperationNode"/>,
+/// its operation. Candidates for a key are computed on its first lookup and reused afterwards.
+/// </summary>
+public sealed class CodeTreePatternRuleIndex
+{
+    private readonly IReadOnlyList<CodeTreeNodePatternRule> _nodeRules;
+    private readonly Dictionary<(Type nodeType, int operation), IReadOnlyList<CodeTreeNodePatternRule>> _candidates = new();
+
+    public CodeTreePatternRuleIndex(IEnumerable<CodeTreePatternRule> rules)
+    {
+        var rulesList = rules.ToList();
+        _nodeRules = rulesList.OfType<CodeTreeNodePatternRule>().ToList();
+        SingleExitNodeRules = rulesList.OfType<SingleExitNodePatternRule>().ToList();
+        ConditionalJumpNodeRules = rulesList.OfType<ConditionalJumpNodePatternRule>().ToList();
+    }
+
+    public IReadOnlyList<SingleExitNodePatternRule> SingleExitNodeRules { get; }
+    public IReadOnlyList<ConditionalJumpNodePatternRule> ConditionalJumpNodeRules { get; }
+
+    /// <summary>
+    /// Returns the rules, in their original order, whose pattern root can match <paramref name="node"/>.
+    /// </summary>
+    public IReadOnlyList<CodeTreeNodePatternRule> CandidatesFor(CodeTreeNode node)
+    {
+        var key = KeyOf(node);
+        if (!_candidates.TryGetValue(key, out var candidates))
+        {
+            candidates = _nodeRules.Where(rule => rule.Pattern.MatchesRootKind(node)).ToList();
+            _candidates[key] = candidates;
+        }
+
+        return candidates;
+    }
+
+    private static (Type nodeType, int operation) KeyOf(CodeTreeNode node) => node switch
+    {
+        BinaryOperationNode binaryNode => (typeof(BinaryOperationNode), (int)binaryNode.Operation),
+        UnaryOperationNode unaryNode => (typeof(UnaryOperationNode), (int)unaryNode.Operation),
+        _ => (node.GetType(), -1)
+    };
+}
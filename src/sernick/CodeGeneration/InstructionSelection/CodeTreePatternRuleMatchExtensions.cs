@@ -78,7 +78,7 @@ public static class CodeTreePatternRuleMatchExtensions
     /// returns true and
     /// sets <see cref="leaves"/> to subtrees that were matched onto Wildcard nodes, and
     /// sets <see cref="GenerateInstructions"/> to a function which, given input register and labels to true/false cases,
-    /// is able to generate a list of assembly instructions.
+    /// is able to generate a list of assembly instructions. A null label means that the case falls through.
     /// </summary>
     public static bool TryMatchConditionalJumpNode(this CodeTreePatternRule rule, ConditionalJumpNode root,
         [NotNullWhen(true)] out IEnumerable<CodeTreeNode>? leaves,
@@ -104,5 +104,5 @@ public static class CodeTreePatternRuleMatchExtensions
     }
 
     public delegate IEnumerable<IInstruction> GenerateConditionalJumpInstructions(Register input,
-        Label trueCase, Label falseCase);
+        Label? trueCase, Label? falseCase);
 }
@@ -122,12 +122,21 @@ public static class LivenessAnalyzer
             var definedRegisters = instruction.RegistersDefined;
             foreach (var x in definedRegisters)
             {
-                foreach (var y in liveRegisters.Where(y => y != x))
+                // The source of a copy is a candidate for coalescing even if it isn't used afterwards,
+                // e.g. saving a callee-saved register at entry and restoring it before return
+                if (instruction.IsCopy)
                 {
-                    if (instruction.IsCopy && instruction.RegistersUsed.Contains(y))
+                    foreach (var y in instruction.RegistersUsed.Where(y => y != x))
                     {
                         copyGraph[x].Add(y);
                         copyGraph[y].Add(x);
+                    }
+                }
+
+                foreach (var y in liveRegisters.Where(y => y != x))
+                {
+                    if (instruction.IsCopy && instruction.RegistersUsed.Contains(y))
+                    {
                         continue;
                     }
 
@@ -43,8 +43,9 @@ public sealed class SpillsAllocator
         IReadOnlyDictionary<Register, HardwareRegister?> allocation)
     {
         // Assign to each unallocated register a new variable location on stack.
+        // Registers from reserve are unallocated too, but they map to themselves, e.g. when defined by a call.
         var spillsLocation = allocation
-            .Where(entry => entry.Value == null)
+            .Where(entry => entry.Value == null && !(entry.Key is HardwareRegister register && _registersReserve.Contains(register)))
             .ToDictionary(entry => entry.Key, _ => functionContext.AllocateStackFrameSlot());
 
         IEnumerable<IAsmable> HandleSpill(IAsmable asmable)
@@ -10,7 +10,13 @@ public sealed class RegexDfa<TAtom> : IDfa<Regex<TAtom>, TAtom> where TAtom : IE
         IEnumerable<Regex<TAtom>> acceptingStates,
         Dictionary<Regex<TAtom>, List<TransitionEdge<Regex<TAtom>, TAtom>>> transitionsToMap,
         Dictionary<Regex<TAtom>, List<TransitionEdge<Regex<TAtom>, TAtom>>> transitionsFromMap
-        ) => (Start, AcceptingStates, _transitionsToMap, _transitionsFromMap) = (regex, acceptingStates, transitionsToMap, transitionsFromMap);
+        )
+    {
+        (Start, AcceptingStates, _transitionsToMap, _transitionsFromMap) = (regex, acceptingStates, transitionsToMap, transitionsFromMap);
+        _transitions = transitionsFromMap.ToDictionary(
+            kv => kv.Key,
+            kv => kv.Value.ToDictionary(edge => edge.Atom, edge => edge.To));
+    }
 
     public Regex<TAtom> Start { get; }
 
@@ -18,7 +24,14 @@ public sealed class RegexDfa<TAtom> : IDfa<Regex<TAtom>, TAtom> where TAtom : IE
 
     public bool IsDead(Regex<TAtom> state) => state.Equals(Regex<TAtom>.Empty);
 
-    public Regex<TAtom> Transition(Regex<TAtom> state, TAtom atom) => state.Derivative(atom);
+    /// <summary>
+    /// For states reachable from <see cref="Start"/>, the precomputed transition is used instead of computing the derivative.
+    /// A derivative by an atom which is not among <see cref="RegexDfaHelpers.PossibleFirstAtoms{TAtom}"/> is always empty.
+    /// </summary>
+    public Regex<TAtom> Transition(Regex<TAtom> state, TAtom atom) =>
+        _transitions.TryGetValue(state, out var transitions)
+            ? transitions.GetValueOrDefault(atom, Regex<TAtom>.Empty)
+            : state.Derivative(atom);
 
     public IEnumerable<TransitionEdge<Regex<TAtom>, TAtom>> GetTransitionsFrom(Regex<TAtom> state) =>
         _transitionsFromMap.TryGetValue(state, out var value)
@@ -30,6 +43,7 @@ public sealed class RegexDfa<TAtom> : IDfa<Regex<TAtom>, TAtom> where TAtom : IE
     public IEnumerable<Regex<TAtom>> AcceptingStates { get; }
     private readonly Dictionary<Regex<TAtom>, List<TransitionEdge<Regex<TAtom>, TAtom>>> _transitionsToMap;
     private readonly Dictionary<Regex<TAtom>, List<TransitionEdge<Regex<TAtom>, TAtom>>> _transitionsFromMap;
+    private readonly Dictionary<Regex<TAtom>, Dictionary<TAtom, Regex<TAtom>>> _transitions;
 
     public static IDfa<Regex<TAtom>, TAtom> FromRegex(Regex<TAtom> start)
     {
@@ -49,9 +63,17 @@ public sealed class RegexDfa<TAtom> : IDfa<Regex<TAtom>, TAtom> where TAtom : IE
                 acceptingStates.Add(currentState);
             }
 
+            transitionsFromMap.GetOrAddEmpty(currentState);
             foreach (var atom in currentState.PossibleFirstAtoms())
             {
                 var nextState = currentState.Derivative(atom);
+
+                // use a single instance for equal states, so that looking them up is cheap
+                if (visited.TryGetValue(nextState, out var visitedState))
+                {
+                    nextState = visitedState;
+                }
+
                 var edge = new TransitionEdge<Regex<TAtom>, TAtom>(currentState, nextState, atom);
 
                 transitionsToMap.GetOrAddEmpty(nextState).Add(edge);
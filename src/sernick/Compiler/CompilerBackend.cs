@@ -30,9 +30,11 @@ public static class CompilerBackend
 
         var functionContextMap = FunctionContextMapProcessor.Process(astRoot, nameResolution, typeCheckingResult, structProperties,
             FunctionDistinctionNumberProcessor.Process(astRoot), new FunctionFactory(LabelGenerator.Generate));
+        var commonSubexpressionEliminator = new CommonSubexpressionEliminator();
         var functionCodeTreeMap = FunctionCodeTreeMapGenerator.Process(astRoot,
             root =>
-                ControlFlowAnalyzer.UnravelControlFlow(root, nameResolution, functionContextMap, callGraph, variableAccessMap, typeCheckingResult, structProperties, SideEffectsAnalyzer.PullOutSideEffects));
+                commonSubexpressionEliminator.Process(
+                    ControlFlowAnalyzer.UnravelControlFlow(root, nameResolution, functionContextMap, callGraph, variableAccessMap, typeCheckingResult, structProperties, SideEffectsAnalyzer.PullOutSideEffects)));
 
         var asm = GenerateAsmCode(functionContextMap, functionCodeTreeMap);
 
@@ -98,13 +98,30 @@ public static class CompilerFrontend
         }
     }
 
-    private static IEnumerable<ParseTreeLeaf<Symbol>> ProcessIntoLeaves(
+    /// <summary>
+    /// Stores tokens in a <see cref="TokenBuffer{TCat}"/> as the parser requests them (so that lexical errors
+    /// are still reported in order with syntax errors), and returns leaves referring to them.
+    /// Tokens with the same category and text share a single <see cref="Terminal"/>.
+    /// </summary>
+    private static IEnumerable<ParseTreeTokenLeaf<Symbol, LexicalGrammarCategory>> ProcessIntoLeaves(
         this IEnumerable<Token<LexicalGrammarCategory>> tokens)
     {
-        return tokens
-            .Where(token => !token.Category.Equals(LexicalGrammarCategory.Whitespaces)) // strip whitespace
-            .Where(token => !token.Category.Equals(LexicalGrammarCategory.Comments)) // ignore comments
-            .Select(token =>
-                new ParseTreeLeaf<Symbol>(new Terminal(token.Category, token.Text), token.LocationRange));
+        var buffer = new TokenBuffer<LexicalGrammarCategory>();
+        var terminals = new Dictionary<(LexicalGrammarCategory, int), Terminal>();
+
+        foreach (var token in tokens
+                     .Where(token => !token.Category.Equals(LexicalGrammarCategory.Whitespaces)) // strip whitespace
+                     .Where(token => !token.Category.Equals(LexicalGrammarCategory.Comments))) // ignore comments
+        {
+            var index = buffer.Add(token);
+            var key = (token.Category, buffer.TextId(index));
+            if (!terminals.TryGetValue(key, out var terminal))
+            {
+                terminal = new Terminal(token.Category, buffer.Text(index));
+                terminals[key] = terminal;
+            }
+
+            yield return new ParseTreeTokenLeaf<Symbol, LexicalGrammarCategory>(terminal, buffer, index);
+        }
     }
 }
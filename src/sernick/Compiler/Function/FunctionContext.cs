@@ -20,11 +20,18 @@ public sealed class FunctionContext : IFunctionContext
     private readonly Dictionary<IFunctionVariable, int> _localVariableSize;
     private readonly Dictionary<IFunctionVariable, bool> _localVariableIsStruct;
     private readonly RegisterValue _localsOffset;
+
+    // Locals offset rounded up to keep the stack aligned in the function body, so that calls don't need to align it
+    private readonly RegisterValue _frameSize;
     private readonly CodeTreeValueNode _displayEntry;
     private readonly Register _oldDisplayValReg;
     private readonly int? _returnedStructSize;
     private readonly Dictionary<HardwareRegister, Register> _registerToTemporaryMap;
 
+    // Maps depths of enclosing functions, whose variables are accessed, to registers holding their frame addresses
+    private readonly SortedDictionary<int, Register> _outerFramePointers;
+    private bool _frameAccessedByNestedFunctions;
+
     public IFunctionContext? ParentContext { get; }
     public Label Label { get; }
     public int Depth { get; }
@@ -52,8 +59,10 @@ public sealed class FunctionContext : IFunctionContext
         _functionParameters = parameters;
         _registerToTemporaryMap = CalleeToSave.ToDictionary<HardwareRegister, HardwareRegister, Register>(reg => reg, _ => new Register(), ReferenceEqualityComparer.Instance);
         _localsOffset = new RegisterValue(0, false);
-        _displayEntry = new GlobalAddress(DisplayTable.DISPLAY_TABLE_SYMBOL) + POINTER_SIZE * Depth;
+        _frameSize = new RegisterValue(0, false);
+        _displayEntry = DisplayEntry(Depth);
         _oldDisplayValReg = new Register();
+        _outerFramePointers = new SortedDictionary<int, Register>();
         _returnedStructSize = returnedStructSize;
 
         var fistArgOffset = POINTER_SIZE * (1 + _functionParameters.Count - REG_ARGS_COUNT);
@@ -69,11 +78,13 @@ public sealed class FunctionContext : IFunctionContext
 
     public void AddLocal(IFunctionVariable variable, bool usedElsewhere = false, bool isStruct = false, int size = POINTER_SIZE)
     {
+        _frameAccessedByNestedFunctions |= usedElsewhere;
+
         if (isStruct || usedElsewhere)
         {
             if (_localVariableLocation.TryAdd(variable, new MemoryLocation(_localsOffset.Value + size)))
             {
-                _localsOffset.Value += size;
+                GrowLocals(size);
             }
         }
         else
@@ -87,17 +98,10 @@ public sealed class FunctionContext : IFunctionContext
 
     public IFunctionCaller.GenerateCallResult GenerateCall(IReadOnlyList<CodeTreeValueNode> arguments)
     {
+        // Caller-saved registers aren't saved explicitly: the call is marked as defining all of them,
+        // so register allocation keeps values which are live across the call out of these registers
         var operations = new List<CodeTreeNode>();
 
-        // Caller-saved registers
-        var callerSavedMap = new Dictionary<HardwareRegister, Register>(ReferenceEqualityComparer.Instance);
-        foreach (var reg in CallerToSave)
-        {
-            var tempReg = new Register();
-            callerSavedMap[reg] = tempReg;
-            operations.Add(Reg(tempReg).Write(Reg(reg).Read()));
-        }
-
         Register rsp = HardwareRegister.RSP;
         Register rax = HardwareRegister.RAX;
 
@@ -123,6 +127,13 @@ public sealed class FunctionContext : IFunctionContext
         // Put args into registers
         operations.AddRange(ArgumentRegisters.Zip(regArgs).Select(p => Reg(p.First).Write(p.Second)));
 
+        // The stack is aligned in the function body, so it stays aligned if an even number of slots is pushed
+        var pushedSlots = stackArgs.Count + stackArgs.Count % 2;
+        if (stackArgs.Count % 2 == 1)
+        {
+            operations.Add(pushRsp);
+        }
+
         // Put args onto stack
         foreach (var arg in stackArgs)
         {
@@ -130,19 +141,14 @@ public sealed class FunctionContext : IFunctionContext
             operations.Add(Mem(rspRead).Write(arg));
         }
 
-        // Align the stack
-        var tmpRsp = Reg(new Register());
-        operations.Add(tmpRsp.Write(rspRead));
-        operations.Add(Reg(rsp).Write(rspRead & -2 * POINTER_SIZE));
-
         // Performing actual call (puts return address on stack and jumps)
         operations.Add(new FunctionCall(this));
 
-        // Restore stack pointer
-        operations.Add(Reg(rsp).Write(tmpRsp.Read()));
-
         // Remove arguments from stack (we already returned from call)
-        operations.Add(Reg(rsp).Write(rspRead + POINTER_SIZE * stackArgs.Count));
+        if (pushedSlots > 0)
+        {
+            operations.Add(Reg(rsp).Write(rspRead + pushedSlots * POINTER_SIZE));
+        }
 
         if (!ValueIsReturned)
         {
@@ -166,14 +172,6 @@ public sealed class FunctionContext : IFunctionContext
             returnValueLocation = Reg(returnValueRegister).Read();
         }
 
-        // Retrieve values of caller-saved registers
-        foreach (var reg in CallerToSave)
-        {
-            var tempReg = callerSavedMap[reg];
-            var tempVal = Reg(tempReg).Read();
-            operations.Add(Reg(reg).Write(tempVal));
-        }
-
         return new IFunctionCaller.GenerateCallResult(CodeTreeListToSingleExitList(operations), returnValueLocation);
     }
 
@@ -198,11 +196,18 @@ public sealed class FunctionContext : IFunctionContext
         operations.Add(Reg(rbp).Write(rspRead));
 
         // Allocate memory for variables
-        operations.Add(Reg(rsp).Write(rspRead - _localsOffset));
+        operations.Add(Reg(rsp).Write(rspRead - _frameSize));
 
-        // Save and update display entry
-        operations.Add(Reg(_oldDisplayValReg).Write(Mem(_displayEntry).Read()));
-        operations.Add(Mem(_displayEntry).Write(rbpRead));
+        // Save and update display entry, if nested functions need it to access this frame
+        if (_frameAccessedByNestedFunctions)
+        {
+            operations.Add(Reg(_oldDisplayValReg).Write(Mem(_displayEntry).Read()));
+            operations.Add(Mem(_displayEntry).Write(rbpRead));
+        }
+
+        // Load addresses of the enclosing functions' frames once; display entries don't change during the function's execution
+        operations.AddRange(_outerFramePointers.Select(entry =>
+            Reg(entry.Value).Write(Mem(DisplayEntry(entry.Key)).Read())));
 
         // Write arguments to known locations
         var paramNum = _functionParameters.Count;
@@ -248,10 +253,13 @@ public sealed class FunctionContext : IFunctionContext
         }
 
         // Restore old display value
-        operations.Add(Mem(_displayEntry).Write(Reg(_oldDisplayValReg).Read()));
+        if (_frameAccessedByNestedFunctions)
+        {
+            operations.Add(Mem(_displayEntry).Write(Reg(_oldDisplayValReg).Read()));
+        }
 
         // Free local variables stack space
-        operations.Add(Reg(rsp).Write(rspRead + _localsOffset));
+        operations.Add(Reg(rsp).Write(rspRead + _frameSize));
 
         // Retrieve old RBP
         operations.Add(Reg(rbp).Write(Mem(rspRead).Read()));
@@ -277,7 +285,7 @@ public sealed class FunctionContext : IFunctionContext
         if (_localVariableLocation.TryGetValue(variable, out var location))
         {
             return isStruct
-                ? ((IFunctionContext)this).GetIndirectVariableLocation(variable)
+                ? ((IFunctionContext)this).GetIndirectVariableLocation(variable, _ => Reg(HardwareRegister.RBP).Read())
                 : location.GenerateRead();
         }
         else
@@ -301,12 +309,12 @@ public sealed class FunctionContext : IFunctionContext
             : new MemoryWrite(GetParentsIndirectVariableLocation(variable), value);
     }
 
-    CodeTreeValueNode IFunctionContext.GetIndirectVariableLocation(IFunctionVariable variable)
+    CodeTreeValueNode IFunctionContext.GetIndirectVariableLocation(IFunctionVariable variable, Func<int, CodeTreeValueNode> frameAddress)
     {
         if (!_localVariableLocation.TryGetValue(variable, out var local))
         {
             // If variable isn't in this context then it should be is the context of some ancestor.
-            return ParentContext?.GetIndirectVariableLocation(variable) ??
+            return ParentContext?.GetIndirectVariableLocation(variable, frameAddress) ??
                    throw new ArgumentException("Variable is undefined");
         }
 
@@ -317,15 +325,24 @@ public sealed class FunctionContext : IFunctionContext
                 nameof(variable));
         }
 
-        return Mem(_displayEntry).Read() - localMemory.Offset;
+        return frameAddress(Depth) - localMemory.Offset;
     }
 
     public VariableLocation AllocateStackFrameSlot()
     {
-        _localsOffset.Value += POINTER_SIZE;
+        GrowLocals(POINTER_SIZE);
         return new MemoryLocation(_localsOffset.Value);
     }
 
+    private void GrowLocals(int size)
+    {
+        _localsOffset.Value += size;
+
+        // Return address and old RBP take two slots, so the frame size has to be a multiple of the alignment
+        const int alignment = 2 * POINTER_SIZE;
+        _frameSize.Value = (_localsOffset.Value + alignment - 1) / alignment * alignment;
+    }
+
     private CodeTreeValueNode GetParentsIndirectVariableLocation(IFunctionVariable variable)
     {
         if (ParentContext == null)
@@ -334,8 +351,16 @@ public sealed class FunctionContext : IFunctionContext
             throw new ArgumentException("Variable is undefined");
         }
 
-        return ParentContext.GetIndirectVariableLocation(variable);
+        return ParentContext.GetIndirectVariableLocation(variable, OuterFramePointer);
     }
+
+    /// <summary>
+    /// Frame address of the enclosing function at <paramref name="depth"/>, cached in a register loaded in the prologue
+    /// </summary>
+    private CodeTreeValueNode OuterFramePointer(int depth) => Reg(_outerFramePointers.GetOrAddEmpty(depth)).Read();
+
+    private static CodeTreeValueNode DisplayEntry(int depth) =>
+        new GlobalAddress(DisplayTable.DISPLAY_TABLE_SYMBOL) + POINTER_SIZE * depth;
 }
 
 internal record MemoryLocation(CodeTreeValueNode Offset) : VariableLocation
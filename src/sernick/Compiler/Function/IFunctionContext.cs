@@ -6,6 +6,10 @@ public interface IFunctionContext : IFunctionCaller
 {
     public void AddLocal(IFunctionVariable variable, bool usedElsewhere = false, bool isStruct = false, int size = POINTER_SIZE);
 
+    /// <summary>
+    ///     Should be called once the code of the function's body is generated,
+    ///     since the prologue loads frame addresses of the enclosing functions whose variables the body accesses.
+    /// </summary>
     public IReadOnlyList<SingleExitNode> GeneratePrologue();
 
     public IReadOnlyList<SingleExitNode> GenerateEpilogue(CodeTreeValueNode? valToReturn);
@@ -23,7 +27,7 @@ public interface IFunctionContext : IFunctionCaller
     ///     depending on whether the variable is stored on the stack or in registers.
     ///     <br/>
     ///     If variable isn't in the function's scope then generates memory read
-    ///     using the Display Table.
+    ///     relative to the frame address of the enclosing function, which is loaded from the Display Table in the prologue.
     /// </summary>
     public CodeTreeValueNode GenerateVariableRead(IFunctionVariable variable);
 
@@ -32,13 +36,17 @@ public interface IFunctionContext : IFunctionCaller
     ///     depending on whether the variable is stored on the stack or in registers.
     ///     <br/>
     ///     If variable isn't in the function's scope then generates memory write
-    ///     using the Display Table.
+    ///     relative to the frame address of the enclosing function, which is loaded from the Display Table in the prologue.
     /// </summary>
     public CodeTreeNode GenerateVariableWrite(IFunctionVariable variable, CodeTreeValueNode value);
 
     public VariableLocation AllocateStackFrameSlot();
 
-    protected internal CodeTreeValueNode GetIndirectVariableLocation(IFunctionVariable variable);
+    /// <summary>
+    ///     Generates address of a variable stored in the frame of this function or of one of its ancestors,
+    ///     relative to <paramref name="frameAddress"/>, which gives the frame address of the function at the given depth.
+    /// </summary>
+    protected internal CodeTreeValueNode GetIndirectVariableLocation(IFunctionVariable variable, Func<int, CodeTreeValueNode> frameAddress);
 }
 
 public abstract record VariableLocation
@@ -1,7 +1,6 @@
 namespace sernick.Compiler.Function;
 using sernick.CodeGeneration;
 using sernick.ControlFlowGraph.CodeTree;
-using static Compiler.PlatformConstants;
 using static ControlFlowGraph.CodeTree.CodeTreeExtensions;
 using static Helpers;
 
@@ -14,25 +13,14 @@ public sealed class MallocCaller : IFunctionCaller
     {
         var operations = new List<CodeTreeNode>();
 
-        Register rsp = HardwareRegister.RSP;
-        var rspRead = Reg(rsp).Read();
-        _ = Reg(rsp).Write(rspRead - POINTER_SIZE);
-
         // Arguments (one):
         // size_t size
         operations.Add(Reg(HardwareRegister.RDI).Write(arguments.Single()));
 
-        // Align the stack
-        var tmpRsp = Reg(new Register());
-        operations.Add(tmpRsp.Write(rspRead));
-        operations.Add(Reg(rsp).Write(rspRead & -2 * POINTER_SIZE));
-
+        // The stack is aligned in the function body
         // Performing actual call (puts return address on stack and jumps)
         operations.Add(new FunctionCall(this));
 
-        // Restore stack pointer
-        operations.Add(Reg(rsp).Write(tmpRsp.Read()));
-
         CodeTreeValueNode returnValueLocation = Reg(HardwareRegister.RAX).Read();
         return new IFunctionCaller.GenerateCallResult(CodeTreeListToSingleExitList(operations), returnValueLocation);
     }
@@ -1,7 +1,6 @@
 namespace sernick.Compiler.Function;
 using sernick.CodeGeneration;
 using sernick.ControlFlowGraph.CodeTree;
-using static Compiler.PlatformConstants;
 using static ControlFlowGraph.CodeTree.CodeTreeExtensions;
 using static Helpers;
 
@@ -25,12 +24,6 @@ public sealed class MemcpyCaller : IFunctionCaller
 
         var operations = new List<CodeTreeNode>();
 
-        Register rsp = HardwareRegister.RSP;
-        var rspRead = Reg(rsp).Read();
-        var pushRsp = Reg(rsp).Write(rspRead - POINTER_SIZE);
-
-        operations.Add(pushRsp);
-
         // call malloc first, then call memcpy
         var (mallocCallOperations, ptrToMemoryAllocatedByMalloc) =
             new MallocCaller().GenerateCall(new CodeTreeValueNode[] { _memoryToAllocBytes });
@@ -48,17 +41,10 @@ public sealed class MemcpyCaller : IFunctionCaller
            )
         ));
 
-        // Align the stack
-        var tmpRsp = Reg(new Register());
-        operations.Add(tmpRsp.Write(rspRead));
-        operations.Add(Reg(rsp).Write(rspRead & -2 * POINTER_SIZE));
-
+        // The stack is aligned in the function body
         // Performing actual call (puts return address on stack and jumps)
         operations.Add(new FunctionCall(this));
 
-        // Restore stack pointer
-        operations.Add(Reg(rsp).Write(tmpRsp.Read()));
-
         return new IFunctionCaller.GenerateCallResult(CodeTreeListToSingleExitList(operations), null);
     }
 }
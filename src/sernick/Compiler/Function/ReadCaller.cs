@@ -38,17 +38,10 @@ public sealed class ReadCaller : IFunctionCaller
         // address
         operations.Add(Reg(HardwareRegister.RSI).Write(rspRead));
 
-        // Align the stack
-        var tmpRsp = Reg(new Register());
-        operations.Add(tmpRsp.Write(rspRead));
-        operations.Add(Reg(rsp).Write(rspRead & -2 * POINTER_SIZE));
-
+        // Two slots were pushed, so the stack is still aligned
         // Performing actual call (puts return address on stack and jumps)
         operations.Add(new FunctionCall(this));
 
-        // Restore stack pointer
-        operations.Add(Reg(rsp).Write(tmpRsp.Read()));
-
         // Put value from stack to virtual register
         var returnValueRegister = new Register();
         operations.Add(Reg(returnValueRegister).Write(Mem(rspRead).Read()));
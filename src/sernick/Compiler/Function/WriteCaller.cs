@@ -17,10 +17,9 @@ public sealed class WriteCaller : IFunctionCaller
 
         Register rsp = HardwareRegister.RSP;
         var rspRead = Reg(rsp).Read();
-        var pushRsp = Reg(rsp).Write(rspRead - POINTER_SIZE);
 
-        // Put format string onto stack
-        operations.Add(pushRsp);
+        // Put format string onto stack, in two slots, so that the stack stays aligned
+        operations.Add(Reg(rsp).Write(rspRead - 2 * POINTER_SIZE));
         operations.Add(Mem(rspRead).Write(FORMAT_STRING));
 
         // Arguments:
@@ -29,19 +28,11 @@ public sealed class WriteCaller : IFunctionCaller
         // value to print
         operations.Add(Reg(HardwareRegister.RSI).Write(arguments.Single()));
 
-        // Align the stack
-        var tmpRsp = Reg(new Register());
-        operations.Add(tmpRsp.Write(rspRead));
-        operations.Add(Reg(rsp).Write(rspRead & -2 * POINTER_SIZE));
-
         // Performing actual call (puts return address on stack and jumps)
         operations.Add(new FunctionCall(this));
 
-        // Restore stack pointer
-        operations.Add(Reg(rsp).Write(tmpRsp.Read()));
-
-        // Free format string slot
-        operations.Add(Reg(rsp).Write(rspRead + POINTER_SIZE));
+        // Free format string slots
+        operations.Add(Reg(rsp).Write(rspRead + 2 * POINTER_SIZE));
 
         return new IFunctionCaller.GenerateCallResult(CodeTreeListToSingleExitList(operations), null);
     }
@@ -21,6 +21,9 @@ public static class InstructionHelper
                 }
 
                 return false;
+            // e.g. allocating an empty stack frame; flags set by it are never read, as conditions are always compared explicitly
+            case BinaryAssignInstruction { Op: BinaryAssignInstructionOp.Add or BinaryAssignInstructionOp.Sub, Right: ImmInstructionOperand { Value.Value: 0 } }:
+                return true;
             default:
                 return false;
         }
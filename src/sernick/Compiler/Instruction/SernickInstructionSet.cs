@@ -334,16 +334,28 @@ public static class SernickInstructionSet
             }
 
             // cmp *, 0
-            // jg $trueLabel
-            // jng $falseLabel
+            // jg $trueLabel    (skipped if true case falls through)
+            // jng $falseLabel  (skipped if false case falls through)
             {
                 yield return new ConditionalJumpNodePatternRule((input, trueCase, falseCase) =>
-                    new List<IInstruction>
+                {
+                    var instructions = new List<IInstruction>
                     {
-                        Bin.Cmp.ToReg(input).FromImm(new RegisterValue(0)),
-                        new JmpCcInstruction(ConditionCode.G, trueCase),
-                        new JmpCcInstruction(ConditionCode.Ng, falseCase)
-                    });
+                        Bin.Cmp.ToReg(input).FromImm(new RegisterValue(0))
+                    };
+
+                    if (trueCase is not null)
+                    {
+                        instructions.Add(new JmpCcInstruction(ConditionCode.G, trueCase));
+                    }
+
+                    if (falseCase is not null)
+                    {
+                        instructions.Add(new JmpCcInstruction(ConditionCode.Ng, falseCase));
+                    }
+
+                    return instructions;
+                });
             }
         }
     }
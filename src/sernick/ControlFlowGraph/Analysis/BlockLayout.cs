@@ -0,0 +1,220 @@
+namespace sernick.ControlFlowGraph.Analysis;
+
+using CodeTree;
+using Utility;
+
+/// <summary>
+/// Decides in which order code trees of a single function are placed in the output,
+/// trying to make as many control-flow edges as possible fall through instead of jumping.
+/// <list type="bullet">
+///     <item>
+///     empty <see cref="SingleExitNode"/>s (which would only contain a jump) are skipped,
+///     and edges leading to them are redirected to their targets
+///     </item>
+///     <item>
+///     bodies of loops (found from back edges) are placed contiguously, and conditional jumps
+///     inside a loop fall through to the successor that stays in the loop
+///     </item>
+///     <item>
+///     otherwise, a successor with a single predecessor is preferred as a fall-through
+///     </item>
+/// </list>
+/// </summary>
+public static class BlockLayout
+{
+    public static IReadOnlyList<CodeTreeRoot> Process(CodeTreeRoot root)
+    {
+        var predecessors = CalculatePredecessors(root);
+        var loops = FindLoops(root, predecessors);
+
+        var placed = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
+        var order = new List<CodeTreeRoot>();
+        var pending = new List<CodeTreeRoot>();
+
+        IReadOnlyList<IReadOnlySet<CodeTreeRoot>> LoopsContaining(CodeTreeRoot node) => loops
+            .Where(body => body.Contains(node))
+            .OrderBy(body => body.Count)
+            .ToList();
+
+        CodeTreeRoot? ChooseFallThrough(CodeTreeRoot node)
+        {
+            var candidates = new List<CodeTreeRoot>();
+            foreach (var successor in Successors(node))
+            {
+                if (!placed.Contains(successor) && !candidates.Any(candidate => ReferenceEquals(candidate, successor)))
+                {
+                    candidates.Add(successor);
+                }
+            }
+
+            if (candidates.Count <= 1)
+            {
+                return candidates.FirstOrDefault();
+            }
+
+            var (trueCase, falseCase) = (candidates[0], candidates[1]);
+            var innermostLoop = LoopsContaining(node).FirstOrDefault();
+
+            var chosen = trueCase;
+            if (innermostLoop is not null && innermostLoop.Contains(trueCase) != innermostLoop.Contains(falseCase))
+            {
+                chosen = innermostLoop.Contains(trueCase) ? trueCase : falseCase;
+            }
+            else if (predecessors[trueCase].Count != 1 && predecessors[falseCase].Count == 1)
+            {
+                chosen = falseCase;
+            }
+
+            pending.Add(ReferenceEquals(chosen, trueCase) ? falseCase : trueCase);
+            return chosen;
+        }
+
+        CodeTreeRoot NextPending()
+        {
+            foreach (var loop in LoopsContaining(order[^1]))
+            {
+                var index = pending.FindLastIndex(loop.Contains);
+                if (index >= 0)
+                {
+                    var result = pending[index];
+                    pending.RemoveAt(index);
+                    return result;
+                }
+            }
+
+            var last = pending[^1];
+            pending.RemoveAt(pending.Count - 1);
+            return last;
+        }
+
+        var current = root;
+        while (true)
+        {
+            while (current is not null && placed.Add(current))
+            {
+                order.Add(current);
+                current = ChooseFallThrough(current);
+            }
+
+            pending.RemoveAll(placed.Contains);
+            if (pending.Count == 0)
+            {
+                return order;
+            }
+
+            current = NextPending();
+        }
+    }
+
+    /// <summary>
+    /// Code trees which can be executed right after <paramref name="node"/>,
+    /// with empty <see cref="SingleExitNode"/>s skipped (see <see cref="SkipJumps"/>).
+    /// For <see cref="ConditionalJumpNode"/> the true case is returned first.
+    /// </summary>
+    public static IEnumerable<CodeTreeRoot> Successors(CodeTreeRoot node) => node switch
+    {
+        SingleExitNode { NextTree: { } next } => SkipJumps(next).Enumerate(),
+        SingleExitNode => Enumerable.Empty<CodeTreeRoot>(),
+        ConditionalJumpNode conditionalNode => new[] { SkipJumps(conditionalNode.TrueCase), SkipJumps(conditionalNode.FalseCase) },
+        _ => throw new Exception($"<BlockLayout> called on a node which is neither a SingleExitNode nor ConditionalJumpNode : {node}")
+    };
+
+    /// <summary>
+    /// Follows the chain of empty <see cref="SingleExitNode"/>s starting at <paramref name="node"/>,
+    /// which would only generate a jump to their next tree, and returns the first non-empty code tree.
+    /// If the chain forms a cycle, returns the node at which the cycle was detected.
+    /// </summary>
+    public static CodeTreeRoot SkipJumps(CodeTreeRoot node)
+    {
+        var visited = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
+        while (node is SingleExitNode { Operations.Count: 0, NextTree: { } next } && visited.Add(node))
+        {
+            node = next;
+        }
+
+        return node;
+    }
+
+    private static IReadOnlyDictionary<CodeTreeRoot, List<CodeTreeRoot>> CalculatePredecessors(CodeTreeRoot root)
+    {
+        var predecessors = new Dictionary<CodeTreeRoot, List<CodeTreeRoot>>(ReferenceEqualityComparer.Instance);
+
+        void Dfs(CodeTreeRoot node)
+        {
+            if (predecessors.ContainsKey(node))
+            {
+                return;
+            }
+
+            predecessors[node] = new List<CodeTreeRoot>();
+            foreach (var successor in Successors(node))
+            {
+                Dfs(successor);
+                predecessors[successor].Add(node);
+            }
+        }
+
+        Dfs(root);
+        return predecessors;
+    }
+
+    /// <summary>
+    /// Finds natural loops: for every back edge u -> h found by a DFS from <paramref name="root"/>,
+    /// the loop consists of h and all the nodes which can reach u without passing through h.
+    /// Loops with the same header are merged.
+    /// </summary>
+    private static IReadOnlyList<IReadOnlySet<CodeTreeRoot>> FindLoops(
+        CodeTreeRoot root,
+        IReadOnlyDictionary<CodeTreeRoot, List<CodeTreeRoot>> predecessors)
+    {
+        var visited = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
+        var onStack = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
+        var loops = new Dictionary<CodeTreeRoot, HashSet<CodeTreeRoot>>(ReferenceEqualityComparer.Instance);
+
+        void AddLoop(CodeTreeRoot latch, CodeTreeRoot header)
+        {
+            if (!loops.TryGetValue(header, out var body))
+            {
+                body = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance) { header };
+                loops[header] = body;
+            }
+
+            var stack = new Stack<CodeTreeRoot>();
+            stack.Push(latch);
+            while (stack.TryPop(out var node))
+            {
+                if (!body.Add(node))
+                {
+                    continue;
+                }
+
+                foreach (var predecessor in predecessors[node])
+                {
+                    stack.Push(predecessor);
+                }
+            }
+        }
+
+        void Dfs(CodeTreeRoot node)
+        {
+            visited.Add(node);
+            onStack.Add(node);
+            foreach (var successor in Successors(node))
+            {
+                if (onStack.Contains(successor))
+                {
+                    AddLoop(node, successor);
+                }
+                else if (!visited.Contains(successor))
+                {
+                    Dfs(successor);
+                }
+            }
+
+            onStack.Remove(node);
+        }
+
+        Dfs(root);
+        return loops.Values.ToList<IReadOnlySet<CodeTreeRoot>>();
+    }
+}
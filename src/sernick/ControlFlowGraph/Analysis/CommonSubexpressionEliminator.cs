@@ -0,0 +1,513 @@
+namespace sernick.ControlFlowGraph.Analysis;
+
+using CodeGeneration;
+using CodeTree;
+using static CodeTree.CodeTreeExtensions;
+using static Compiler.PlatformConstants;
+
+/// <summary>
+/// Local value numbering over code trees of a single function.
+/// Values are numbered along extended basic blocks: a code tree with a single predecessor
+/// inherits the values known at the end of its predecessor.
+/// An expression computed again while its value is still known is replaced with a read of
+/// a virtual register, to which the value is written the first time it is computed.
+/// </summary>
+public sealed class CommonSubexpressionEliminator
+{
+    /// <summary>
+    /// Number of operations (arithmetic operations and memory reads) which are no longer computed,
+    /// because their value is reused instead
+    /// </summary>
+    public long EliminatedComputations { get; private set; }
+
+    public void ResetCounters() => EliminatedComputations = 0;
+
+    /// <summary>
+    /// Returns a copy of the code tree graph starting at <paramref name="root"/>, with common subexpressions eliminated.
+    /// The original graph is left untouched.
+    /// </summary>
+    public CodeTreeRoot Process(CodeTreeRoot root)
+    {
+        var predecessorsCount = CountPredecessors(root);
+
+        // The first pass only finds out which values are going to be reused,
+        // the second one (which assigns exactly the same value numbers) rewrites the code trees
+        var analysis = new ValueNumbering(reuses: null);
+        analysis.Run(root, predecessorsCount);
+        var rewrite = new ValueNumbering(analysis.Reuses);
+        rewrite.Run(root, predecessorsCount);
+
+        EliminatedComputations += rewrite.EliminatedComputations;
+        return Clone(root, rewrite.Operations, rewrite.Conditions);
+    }
+
+    private static IReadOnlyDictionary<CodeTreeRoot, int> CountPredecessors(CodeTreeRoot root)
+    {
+        var count = new Dictionary<CodeTreeRoot, int>(ReferenceEqualityComparer.Instance) { [root] = 0 };
+        var stack = new Stack<CodeTreeRoot>();
+        stack.Push(root);
+        while (stack.TryPop(out var node))
+        {
+            foreach (var successor in Successors(node))
+            {
+                if (count.TryGetValue(successor, out var successorCount))
+                {
+                    count[successor] = successorCount + 1;
+                }
+                else
+                {
+                    count[successor] = 1;
+                    stack.Push(successor);
+                }
+            }
+        }
+
+        return count;
+    }
+
+    private static IEnumerable<CodeTreeRoot> Successors(CodeTreeRoot node) => node switch
+    {
+        SingleExitNode { NextTree: { } next } => new[] { next },
+        SingleExitNode => Enumerable.Empty<CodeTreeRoot>(),
+        ConditionalJumpNode conditionalNode => new[] { conditionalNode.TrueCase, conditionalNode.FalseCase },
+        _ => throw new Exception($"<CommonSubexpressionEliminator> called on a node which is neither a SingleExitNode nor ConditionalJumpNode : {node}")
+    };
+
+    private static CodeTreeRoot Clone(
+        CodeTreeRoot root,
+        IReadOnlyDictionary<SingleExitNode, IReadOnlyList<CodeTreeNode>> operations,
+        IReadOnlyDictionary<ConditionalJumpNode, CodeTreeValueNode> conditions)
+    {
+        var clones = new Dictionary<CodeTreeRoot, CodeTreeRoot>(ReferenceEqualityComparer.Instance);
+
+        CodeTreeRoot CloneNode(CodeTreeRoot node)
+        {
+            if (clones.TryGetValue(node, out var clone))
+            {
+                return clone;
+            }
+
+            if (node is ConditionalJumpNode conditionalNode)
+            {
+                var trueCase = CloneNode(conditionalNode.TrueCase);
+                var falseCase = CloneNode(conditionalNode.FalseCase);
+                if (!clones.TryGetValue(node, out clone))
+                {
+                    clone = new ConditionalJumpNode(trueCase, falseCase, conditions[conditionalNode]);
+                    clones[node] = clone;
+                }
+
+                return clone;
+            }
+
+            // Chains of SingleExitNodes are cloned iteratively, as they can be very long
+            SingleExitNode? previous = null;
+            var current = node;
+            while (current is SingleExitNode singleExitNode && !clones.ContainsKey(singleExitNode))
+            {
+                var singleExitClone = new SingleExitNode(null, operations[singleExitNode]);
+                clones[singleExitNode] = singleExitClone;
+                if (previous is not null)
+                {
+                    previous.NextTree = singleExitClone;
+                }
+
+                previous = singleExitClone;
+                current = singleExitNode.NextTree;
+            }
+
+            if (previous is not null && current is not null)
+            {
+                previous.NextTree = CloneNode(current);
+            }
+
+            return clones[node];
+        }
+
+        return CloneNode(root);
+    }
+
+    /// <summary>
+    /// Numbers values computed in a function's code trees.
+    /// Equal value numbers mean that the values are equal, no matter where they are computed.
+    /// </summary>
+    private sealed class ValueNumbering
+    {
+        private readonly Dictionary<int, int>? _reuses;
+        private readonly Dictionary<object, int> _numbers = new();
+        private readonly Dictionary<RegisterValue, int> _mutableConstants = new(ReferenceEqualityComparer.Instance);
+        private readonly Dictionary<int, AddressForm> _addressForms = new();
+        private int _nextNumber;
+
+        private readonly Dictionary<SingleExitNode, IReadOnlyList<CodeTreeNode>> _operations = new(ReferenceEqualityComparer.Instance);
+        private readonly Dictionary<ConditionalJumpNode, CodeTreeValueNode> _conditions = new(ReferenceEqualityComparer.Instance);
+
+        /// <param name="reuses">
+        /// How many times each value is reused, as counted by a previous run of the same numbering.
+        /// If null, the reuses are counted and no rewriting is done.
+        /// </param>
+        public ValueNumbering(Dictionary<int, int>? reuses)
+        {
+            _reuses = reuses;
+            Reuses = reuses ?? new Dictionary<int, int>();
+        }
+
+        public Dictionary<int, int> Reuses { get; }
+        public long EliminatedComputations { get; private set; }
+        public IReadOnlyDictionary<SingleExitNode, IReadOnlyList<CodeTreeNode>> Operations => _operations;
+        public IReadOnlyDictionary<ConditionalJumpNode, CodeTreeValueNode> Conditions => _conditions;
+
+        private bool Rewrites => _reuses is not null;
+
+        public void Run(CodeTreeRoot root, IReadOnlyDictionary<CodeTreeRoot, int> predecessorsCount)
+        {
+            _numbers.Clear();
+            _mutableConstants.Clear();
+            _addressForms.Clear();
+            _nextNumber = 0;
+
+            // Each extended basic block is processed from its head; the known values are
+            // passed on to successors which can only be entered from the current code tree
+            var heads = predecessorsCount.Keys
+                .Where(node => ReferenceEquals(node, root) || predecessorsCount[node] != 1);
+            foreach (var head in heads)
+            {
+                var stack = new Stack<(CodeTreeRoot, KnownValues)>();
+                stack.Push((head, new KnownValues()));
+                while (stack.TryPop(out var entry))
+                {
+                    var (node, known) = entry;
+                    ProcessNode(node, known);
+
+                    var successors = Successors(node)
+                        .Where(successor => !ReferenceEquals(successor, root) && predecessorsCount[successor] == 1)
+                        .ToList();
+                    foreach (var successor in successors)
+                    {
+                        stack.Push((successor, successors.Count > 1 ? known.Clone() : known));
+                    }
+                }
+            }
+        }
+
+        private void ProcessNode(CodeTreeRoot node, KnownValues known)
+        {
+            switch (node)
+            {
+                case SingleExitNode singleExitNode:
+                    var operations = new List<CodeTreeNode>();
+                    foreach (var operation in singleExitNode.Operations)
+                    {
+                        // Values hoisted to registers are added to operations before the rewritten operation
+                        var rewritten = ProcessOperation(operation, known, operations);
+                        operations.Add(rewritten);
+                    }
+
+                    _operations[singleExitNode] = operations;
+                    break;
+                case ConditionalJumpNode conditionalNode:
+                    // There is no place for hoisted values before a condition, so it only reuses known values
+                    _conditions[conditionalNode] = Visit(conditionalNode.ConditionEvaluation, known, hoisted: null);
+                    break;
+            }
+        }
+
+        private CodeTreeNode ProcessOperation(CodeTreeNode operation, KnownValues known, List<CodeTreeNode> hoisted)
+        {
+            switch (operation)
+            {
+                case RegisterWrite(var register, var value):
+                    {
+                        var valueNumber = Number(value, known);
+                        var rewritten = Visit(value, known, hoisted);
+                        known.Registers[register] = valueNumber;
+                        return ReferenceEquals(rewritten, value) ? operation : new RegisterWrite(register, rewritten);
+                    }
+                case MemoryWrite(var location, var value):
+                    {
+                        var locationNumber = Number(location, known);
+                        var rewrittenLocation = Visit(location, known, hoisted);
+                        var rewrittenValue = Visit(value, known, hoisted);
+                        foreach (var address in known.Memory.Keys.Where(address => MayAlias(address, locationNumber)).ToList())
+                        {
+                            known.Memory.Remove(address);
+                        }
+
+                        return ReferenceEquals(rewrittenLocation, location) && ReferenceEquals(rewrittenValue, value)
+                            ? operation
+                            : new MemoryWrite(rewrittenLocation, rewrittenValue);
+                    }
+                case FunctionCall:
+                    {
+                        // Display table entries are restored by the callee before it returns,
+                        // so only the memory which the callee could modify is forgotten
+                        foreach (var address in known.Memory.Keys.Where(address => !_addressForms[address].IsGlobal).ToList())
+                        {
+                            known.Memory.Remove(address);
+                        }
+
+                        foreach (var register in known.Registers.Keys.OfType<HardwareRegister>().Where(ClobberedByCall).ToList())
+                        {
+                            known.Registers.Remove(register);
+                        }
+
+                        return operation;
+                    }
+                case CodeTreeValueNode value:
+                    return Visit(value, known, hoisted);
+                default:
+                    return operation;
+            }
+        }
+
+        /// <summary>
+        /// Rewrites <paramref name="node"/>, replacing values which are already known with reads of registers holding them.
+        /// If <paramref name="hoisted"/> isn't null, values computed for the first time become known,
+        /// and writes of those which are reused later are added to it.
+        /// </summary>
+        private CodeTreeValueNode Visit(CodeTreeValueNode node, KnownValues known, List<CodeTreeNode>? hoisted)
+        {
+            if (!IsWorthReusing(node))
+            {
+                return node;
+            }
+
+            var number = Number(node, known);
+            if (known.Computed.Contains(number))
+            {
+                if (!Rewrites)
+                {
+                    Reuses[number] = Reuses.GetValueOrDefault(number) + 1;
+                    return node;
+                }
+
+                EliminatedComputations += CountComputations(node);
+                return Reg(known.Holders[number]).Read();
+            }
+
+            var rewritten = node switch
+            {
+                BinaryOperationNode(var operation, var left, var right) =>
+                    RewriteIfChanged(node, left, right, Visit(left, known, hoisted), Visit(right, known, hoisted),
+                        (newLeft, newRight) => new BinaryOperationNode(operation, newLeft, newRight)),
+                UnaryOperationNode(var operation, var operand) =>
+                    RewriteIfChanged(node, operand, Visit(operand, known, hoisted),
+                        newOperand => new UnaryOperationNode(operation, newOperand)),
+                MemoryRead(var location) =>
+                    RewriteIfChanged(node, location, Visit(location, known, hoisted),
+                        newLocation => new MemoryRead(newLocation)),
+                _ => node
+            };
+
+            if (hoisted is null)
+            {
+                return rewritten;
+            }
+
+            known.Computed.Add(number);
+            if (!Rewrites || _reuses!.GetValueOrDefault(number) == 0)
+            {
+                return rewritten;
+            }
+
+            var holder = new Register();
+            hoisted.Add(Reg(holder).Write(rewritten));
+            known.Holders[number] = holder;
+            return Reg(holder).Read();
+        }
+
+        private int Number(CodeTreeValueNode node, KnownValues known)
+        {
+            switch (node)
+            {
+                case Constant { Value: { IsFinal: true } value }:
+                    return Intern(new ConstantKey(value.Value));
+                case Constant { Value: var value }:
+                    // Value of a non-final constant can still change, so it is identified by reference
+                    if (!_mutableConstants.TryGetValue(value, out var constantNumber))
+                    {
+                        constantNumber = NewNumber();
+                        _mutableConstants[value] = constantNumber;
+                    }
+
+                    return constantNumber;
+                case GlobalAddress(var label):
+                    {
+                        var number = Intern(new GlobalAddressKey(label));
+                        _addressForms[number] = new AddressForm(number, 0, IsGlobal: true);
+                        return number;
+                    }
+                case RegisterRead(var register):
+                    if (!known.Registers.TryGetValue(register, out var registerNumber))
+                    {
+                        registerNumber = NewNumber();
+                        known.Registers[register] = registerNumber;
+                    }
+
+                    return registerNumber;
+                case BinaryOperationNode(var operation, var left, var right):
+                    {
+                        var (leftNumber, rightNumber) = (Number(left, known), Number(right, known));
+                        if (IsCommutative(operation) && leftNumber > rightNumber)
+                        {
+                            (leftNumber, rightNumber) = (rightNumber, leftNumber);
+                        }
+
+                        var number = Intern(new BinaryOperationKey(operation, leftNumber, rightNumber));
+                        if (!_addressForms.ContainsKey(number))
+                        {
+                            _addressForms[number] = (operation, right) switch
+                            {
+                                (BinaryOperation.Add, Constant { Value.IsFinal: true } offset) =>
+                                    FormOf(Number(left, known)).Shift(offset.Value.Value),
+                                (BinaryOperation.Sub, Constant { Value.IsFinal: true } offset) =>
+                                    FormOf(Number(left, known)).Shift(-offset.Value.Value),
+                                _ => new AddressForm(number, 0, IsGlobal: false)
+                            };
+                        }
+
+                        return number;
+                    }
+                case UnaryOperationNode(var operation, var operand):
+                    return Intern(new UnaryOperationKey(operation, Number(operand, known)));
+                case MemoryRead(var location):
+                    {
+                        var locationNumber = Number(location, known);
+                        FormOf(locationNumber);
+                        if (!known.Memory.TryGetValue(locationNumber, out var number))
+                        {
+                            number = NewNumber();
+                            known.Memory[locationNumber] = number;
+                        }
+
+                        return number;
+                    }
+                default:
+                    return NewNumber();
+            }
+        }
+
+        private AddressForm FormOf(int number)
+        {
+            if (!_addressForms.TryGetValue(number, out var form))
+            {
+                form = new AddressForm(number, 0, IsGlobal: false);
+                _addressForms[number] = form;
+            }
+
+            return form;
+        }
+
+        /// <summary>
+        /// Two addresses with the same base don't alias if they are at least a word apart.
+        /// Memory at a global address (the display table) is never accessed through any other address.
+        /// Apart from that, any two addresses can alias.
+        /// </summary>
+        private bool MayAlias(int first, int second)
+        {
+            var (firstForm, secondForm) = (FormOf(first), FormOf(second));
+            if (firstForm.Base == secondForm.Base)
+            {
+                return Math.Abs(firstForm.Offset - secondForm.Offset) < POINTER_SIZE;
+            }
+
+            return !firstForm.IsGlobal && !secondForm.IsGlobal;
+        }
+
+        private int Intern(object key)
+        {
+            if (!_numbers.TryGetValue(key, out var number))
+            {
+                number = NewNumber();
+                _numbers[key] = number;
+            }
+
+            return number;
+        }
+
+        private int NewNumber() => _nextNumber++;
+    }
+
+    /// <summary>
+    /// Values known at some point of the program, valid along a single path of an extended basic block
+    /// </summary>
+    private sealed class KnownValues
+    {
+        public Dictionary<Register, int> Registers { get; private init; } = new();
+
+        /// <summary>
+        /// Value numbers of memory contents, by value numbers of their addresses
+        /// </summary>
+        public Dictionary<int, int> Memory { get; private init; } = new();
+
+        /// <summary>
+        /// Values computed by some expression which can be reused
+        /// </summary>
+        public HashSet<int> Computed { get; private init; } = new();
+
+        public Dictionary<int, Register> Holders { get; private init; } = new();
+
+        public KnownValues Clone() => new()
+        {
+            Registers = new Dictionary<Register, int>(Registers),
+            Memory = new Dictionary<int, int>(Memory),
+            Computed = new HashSet<int>(Computed),
+            Holders = new Dictionary<int, Register>(Holders)
+        };
+    }
+
+    /// <summary>
+    /// Address equal to value <paramref name="Base"/> plus a constant <paramref name="Offset"/>
+    /// </summary>
+    private sealed record AddressForm(int Base, long Offset, bool IsGlobal)
+    {
+        public AddressForm Shift(long offset) => this with { Offset = Offset + offset };
+    }
+
+    private sealed record ConstantKey(long Value);
+    private sealed record GlobalAddressKey(Label Label);
+    private sealed record BinaryOperationKey(BinaryOperation Operation, int Left, int Right);
+    private sealed record UnaryOperationKey(UnaryOperation Operation, int Operand);
+
+    /// <summary>
+    /// Register reads and constants are free to compute again, and keeping register plus constant
+    /// in the tree lets instruction covering use it as a memory displacement
+    /// </summary>
+    private static bool IsWorthReusing(CodeTreeValueNode node) => node switch
+    {
+        MemoryRead => true,
+        BinaryOperationNode { Left: RegisterRead or GlobalAddress, Right: Constant } => false,
+        BinaryOperationNode or UnaryOperationNode => true,
+        _ => false
+    };
+
+    private static bool IsCommutative(BinaryOperation operation) => operation is
+        BinaryOperation.Add or BinaryOperation.Mul or
+        BinaryOperation.Equal or BinaryOperation.NotEqual or
+        BinaryOperation.BitwiseAnd or BinaryOperation.BitwiseOr;
+
+    /// <summary>
+    /// RBP and RSP have the same value after the call as before it
+    /// </summary>
+    private static bool ClobberedByCall(HardwareRegister register) =>
+        !register.Equals(HardwareRegister.RBP) && !register.Equals(HardwareRegister.RSP);
+
+    private static int CountComputations(CodeTreeValueNode node) => node switch
+    {
+        BinaryOperationNode(_, var left, var right) => 1 + CountComputations(left) + CountComputations(right),
+        UnaryOperationNode(_, var operand) => 1 + CountComputations(operand),
+        MemoryRead(var location) => 1 + CountComputations(location),
+        _ => 0
+    };
+
+    private static CodeTreeValueNode RewriteIfChanged(CodeTreeValueNode node,
+        CodeTreeValueNode left, CodeTreeValueNode right,
+        CodeTreeValueNode newLeft, CodeTreeValueNode newRight,
+        Func<CodeTreeValueNode, CodeTreeValueNode, CodeTreeValueNode> rebuild) =>
+        ReferenceEquals(left, newLeft) && ReferenceEquals(right, newRight) ? node : rebuild(newLeft, newRight);
+
+    private static CodeTreeValueNode RewriteIfChanged(CodeTreeValueNode node,
+        CodeTreeValueNode child, CodeTreeValueNode newChild,
+        Func<CodeTreeValueNode, CodeTreeValueNode> rebuild) =>
+        ReferenceEquals(child, newChild) ? node : rebuild(newChild);
+}
@@ -5,6 +5,11 @@ using sernick.ControlFlowGraph.CodeTree;
 public interface IInstructionCovering
 {
     public IEnumerable<IInstruction> Cover(SingleExitNode node, Label? next);
-    public IEnumerable<IInstruction> Cover(ConditionalJumpNode node, Label trueCase, Label falseCase);
+    /// <summary>
+    /// Covers a conditional jump. At most one of <paramref name="trueCase"/> and <paramref name="falseCase"/>
+    /// can be null, which means that the corresponding code is placed right after this node,
+    /// so no jump to it is needed.
+    /// </summary>
+    public IEnumerable<IInstruction> Cover(ConditionalJumpNode node, Label? trueCase, Label? falseCase);
 }
 
@@ -15,14 +15,35 @@ public sealed class InstructionCovering : IInstructionCovering
 
     private const uint Inf = (uint)1e9;
 
-    private readonly IEnumerable<CodeTreePatternRule> _rules;
+    private readonly CodeTreePatternRuleIndex _rules;
+
+    /// <summary>
+    /// Best covers of the subtrees of the tree currently being covered.
+    /// It is cleared before covering each tree, so it never keeps nodes of previously covered trees alive.
+    /// </summary>
     private readonly Dictionary<CodeTreeNode, TreeCoverResult?> _resMemoizer;
     public InstructionCovering(IEnumerable<CodeTreePatternRule> rules)
     {
-        _rules = rules.ToList();
+        _rules = new CodeTreePatternRuleIndex(rules);
         _resMemoizer = new Dictionary<CodeTreeNode, TreeCoverResult?>(ReferenceEqualityComparer.Instance);
     }
 
+    /// <summary>
+    /// Number of times a rule was tried against a node, for profiling instruction selection.
+    /// </summary>
+    public long RuleMatchAttempts { get; private set; }
+
+    /// <summary>
+    /// Number of times a rule was successfully matched onto a node, for profiling instruction selection.
+    /// </summary>
+    public long RuleMatchSuccesses { get; private set; }
+
+    public void ResetCounters()
+    {
+        RuleMatchAttempts = 0;
+        RuleMatchSuccesses = 0;
+    }
+
     private TreeCoverResult? CoverTree(CodeTreeNode node)
     {
         if (_resMemoizer.TryGetValue(node, out var result))
@@ -31,13 +52,15 @@ public sealed class InstructionCovering : IInstructionCovering
         }
 
         TreeCoverResult? best = null;
-        foreach (var patternRule in _rules)
+        foreach (var patternRule in _rules.CandidatesFor(node))
         {
+            RuleMatchAttempts++;
             if (patternRule.TryMatchCodeTreeNode(node,
                 out var leaves,
                 out var generateInstructions
                 ))
             {
+                RuleMatchSuccesses++;
                 var leavesList = leaves.ToList();
                 var cost = 1 + LeavesCost(leavesList);
                 if (best == null || cost < best.Cost)
@@ -53,14 +76,17 @@ public sealed class InstructionCovering : IInstructionCovering
 
     public IEnumerable<IInstruction> Cover(SingleExitNode node, Label? next)
     {
+        _resMemoizer.Clear();
         SingleExitCoverResult? best = null;
-        foreach (var patternRule in _rules)
+        foreach (var patternRule in _rules.SingleExitNodeRules)
         {
+            RuleMatchAttempts++;
             if (patternRule.TryMatchSingleExitNode(node,
                 out var leaves,
                 out var generateInstructions
                 ))
             {
+                RuleMatchSuccesses++;
                 var leavesList = leaves.ToList();
                 var cost = 1 + LeavesCost(leavesList);
 
@@ -76,19 +102,22 @@ public sealed class InstructionCovering : IInstructionCovering
             throw new Exception("Unable to cover with given covering rules set.");
         }
 
-        return GenerateSingleExitCovering(best, next);
+        return GenerateSingleExitCovering(best, next).ToList();
     }
 
-    public IEnumerable<IInstruction> Cover(ConditionalJumpNode node, Label trueCase, Label falseCase)
+    public IEnumerable<IInstruction> Cover(ConditionalJumpNode node, Label? trueCase, Label? falseCase)
     {
+        _resMemoizer.Clear();
         ConditionalJumpCoverResult? best = null;
-        foreach (var patternRule in _rules)
+        foreach (var patternRule in _rules.ConditionalJumpNodeRules)
         {
+            RuleMatchAttempts++;
             if (patternRule.TryMatchConditionalJumpNode(node,
                 out var leaves,
                 out var generateInstructions
                 ))
             {
+                RuleMatchSuccesses++;
                 var leavesList = leaves.ToList();
                 var cost = 1 + LeavesCost(leavesList);
                 if (best == null || cost < best.Cost)
@@ -103,18 +132,19 @@ public sealed class InstructionCovering : IInstructionCovering
             throw new Exception("Unable to cover with given covering rules set.");
         }
 
-        return GenerateConditionalJumpCovering(best, trueCase, falseCase);
+        return GenerateConditionalJumpCovering(best, trueCase, falseCase).ToList();
     }
 
     public IEnumerable<IInstruction> Cover(CodeTreeNode node)
     {
+        _resMemoizer.Clear();
         var result = CoverTree(node);
         if (result == null)
         {
             throw new Exception("Unable to cover with given covering rules set.");
         }
 
-        return GenerateCovering(result, out _);
+        return GenerateCovering(result, out _).ToList();
     }
 
     private uint LeavesCost(IEnumerable<CodeTreeNode> leaves)
@@ -156,7 +186,7 @@ public sealed class InstructionCovering : IInstructionCovering
             .Concat(next is not null ? result.Generator(next) : Enumerable.Empty<IInstruction>());
     }
 
-    private IEnumerable<IInstruction> GenerateConditionalJumpCovering(ConditionalJumpCoverResult result, Label trueCase, Label falseCase)
+    private IEnumerable<IInstruction> GenerateConditionalJumpCovering(ConditionalJumpCoverResult result, Label? trueCase, Label? falseCase)
     {
         if (result.Leaves.Count != 1)
         {
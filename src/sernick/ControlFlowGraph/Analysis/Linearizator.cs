@@ -1,144 +1,118 @@
 namespace sernick.ControlFlowGraph.Analysis;
 
-using System.Diagnostics;
 using CodeGeneration;
 using CodeTree;
-using Utility;
 
 public sealed class Linearizator
 {
     private readonly IInstructionCovering _instructionCovering;
-    private readonly ISet<CodeTreeRoot> _visited;
     private readonly LabelGenerator _labelGenerator;
-    private IReadOnlySet<CodeTreeRoot> _requiresLabel;
 
     public Linearizator(IInstructionCovering instructionCovering)
     {
         _instructionCovering = instructionCovering;
-        _visited = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
         _labelGenerator = new LabelGenerator();
-        _requiresLabel = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
     }
 
+    /// <summary>
+    /// Emits code trees in the order given by <see cref="BlockLayout"/>.
+    /// Jumps are generated only for the edges which don't lead to the code tree placed right after,
+    /// and labels only for the code trees which are targets of such jumps (and for the root).
+    /// </summary>
     public IEnumerable<IAsmable> Linearize(CodeTreeRoot root, Label startLabel)
     {
         _labelGenerator.SetStart(root, startLabel);
-        _requiresLabel = CalculateRequiresLabel(root);
-        _visited.Clear();
-        return Dfs(root, out _).asmables;
-    }
+        var layout = BlockLayout.Process(root);
+        var requiresLabel = CalculateRequiresLabel(layout);
 
-    private (Label? label, IEnumerable<IAsmable> asmables) Dfs(CodeTreeRoot root, out bool processedBefore)
-    {
-        if (_visited.Contains(root))
+        var result = new List<IAsmable>();
+        foreach (var (node, index) in layout.Select((node, index) => (node, index)))
         {
-            processedBefore = true;
-            return (_labelGenerator.GetLabel(root), Enumerable.Empty<IAsmable>());
-        }
-
-        processedBefore = false;
-        _visited.Add(root);
+            var placedNext = index + 1 < layout.Count ? layout[index + 1] : null;
 
-        var label = _requiresLabel.Contains(root) ? _labelGenerator.GetLabel(root) : null;
+            if (requiresLabel.Contains(node))
+            {
+                result.Add(_labelGenerator.GetLabel(node));
+            }
 
-        var asmables = root switch
-        {
-            SingleExitNode node => HandleSingleExitNode(node),
-            ConditionalJumpNode conditionalNode => HandleConditionalJumpNode(conditionalNode),
-            _ => throw new Exception(
-                $"<Linearizator> called on a node which is neither a SingleExitNode nor ConditionalJumpNode : {root}")
-        };
+            result.AddRange(node switch
+            {
+                SingleExitNode singleExitNode => HandleSingleExitNode(singleExitNode, placedNext),
+                ConditionalJumpNode conditionalNode => HandleConditionalJumpNode(conditionalNode, placedNext),
+                _ => throw new Exception(
+                    $"<Linearizator> called on a node which is neither a SingleExitNode nor ConditionalJumpNode : {node}")
+            });
+        }
 
-        return (label, label is null ? asmables : label.Enumerate().Concat(asmables));
+        return result;
     }
 
-    private IEnumerable<IAsmable> HandleSingleExitNode(SingleExitNode node)
+    private IEnumerable<IAsmable> HandleSingleExitNode(SingleExitNode node, CodeTreeRoot? placedNext)
     {
-        if (node.NextTree == null)
-        {
-            return _instructionCovering.Cover(node, null);
-        }
-
-        var (nextTreeLabel, nextTreeCoverWithLabel) = Dfs(node.NextTree, out var processedBefore);
-
-        // if the nextTree wasn't processed before, then we will have it placed right after the code
-        // for this node, so there is no need to generate a jump to nextTreeLabel at the end
-        var nodeCover = processedBefore ?
-            _instructionCovering.Cover(node, nextTreeLabel) : _instructionCovering.Cover(node, null);
-
-        return nodeCover.Concat(nextTreeCoverWithLabel);
+        var next = BlockLayout.Successors(node).SingleOrDefault();
+        return _instructionCovering.Cover(node, JumpTarget(next, placedNext));
     }
 
-    private IEnumerable<IAsmable> HandleConditionalJumpNode(ConditionalJumpNode conditionalNode)
+    private IEnumerable<IAsmable> HandleConditionalJumpNode(ConditionalJumpNode conditionalNode, CodeTreeRoot? placedNext)
     {
-        var (trueCaseLabel, trueCaseCoverWithLabel) = Dfs(conditionalNode.TrueCase, out _);
+        var trueCase = BlockLayout.SkipJumps(conditionalNode.TrueCase);
+        var falseCase = BlockLayout.SkipJumps(conditionalNode.FalseCase);
 
-        var (falseCaseLabel, falseCaseCoverWithLabel) = Dfs(conditionalNode.FalseCase, out _);
+        // at most one of the cases can fall through to the code tree placed right after this node
+        var trueCaseLabel = JumpTarget(trueCase, placedNext);
+        var falseCaseLabel = trueCaseLabel is null ? _labelGenerator.GetLabel(falseCase) : JumpTarget(falseCase, placedNext);
 
-        Debug.Assert(trueCaseLabel is not null && falseCaseLabel is not null);
-
-        var conditionalNodeCover = _instructionCovering.Cover(conditionalNode, trueCaseLabel, falseCaseLabel);
+        return _instructionCovering.Cover(conditionalNode, trueCaseLabel, falseCaseLabel);
+    }
 
-        // trueCaseCoverWithLabel and falseCaseCoverWithLabel are possibly empty lists, if those trees were already visited
-        // so we can Concat(..) them here without any conditional checks
-        return conditionalNodeCover.Concat(trueCaseCoverWithLabel).Concat(falseCaseCoverWithLabel);
+    /// <summary>
+    /// Returns the label to jump to in order to get to <paramref name="target"/>,
+    /// or null if no jump is needed, because the target is placed right after the current node.
+    /// </summary>
+    private Label? JumpTarget(CodeTreeRoot? target, CodeTreeRoot? placedNext)
+    {
+        return target is null || ReferenceEquals(target, placedNext) ? null : _labelGenerator.GetLabel(target);
     }
 
     /// <summary>
     /// Calculates all the nodes that require labels:
     /// <list type="bullet">
     ///     <item>
-    ///     nodes that are children of conditional jumps
-    ///     </item>
-    ///     <item>
-    ///     nodes that have in degree higher than 1
+    ///     nodes that are reached by a jump, that is not placed right after (one of) their predecessors
     ///     </item>
     ///     <item>
     ///     the root
     ///     </item>
     /// </list>
+    /// Labels are generated here in the order of <paramref name="layout"/>.
     /// </summary>
-    /// <returns></returns>
-    private static IReadOnlySet<CodeTreeRoot> CalculateRequiresLabel(CodeTreeRoot root)
+    private IReadOnlySet<CodeTreeRoot> CalculateRequiresLabel(IReadOnlyList<CodeTreeRoot> layout)
     {
-        var inDegreeHigherThanOne = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
-        var conditionalNodeChildren = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
-        var visited = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
-        var result = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance);
+        var result = new HashSet<CodeTreeRoot>(ReferenceEqualityComparer.Instance) { layout[0] };
 
-        void Dfs(CodeTreeRoot node)
+        foreach (var (node, index) in layout.Select((node, index) => (node, index)))
         {
-            if (visited.Contains(node))
+            var placedNext = index + 1 < layout.Count ? layout[index + 1] : null;
+            var successors = BlockLayout.Successors(node).ToList();
+            var fallsThrough = false;
+            foreach (var successor in successors)
             {
-                inDegreeHigherThanOne.Add(node);
-                return;
-            }
-
-            visited.Add(node);
-
-            switch (node)
-            {
-                case SingleExitNode singleExitNode:
-                    if (singleExitNode.NextTree is not null)
-                    {
-                        Dfs(singleExitNode.NextTree);
-                    }
-
-                    break;
-                case ConditionalJumpNode conditionalJumpNode:
-                    conditionalNodeChildren.Add(conditionalJumpNode.FalseCase);
-                    conditionalNodeChildren.Add(conditionalJumpNode.TrueCase);
-                    Dfs(conditionalJumpNode.FalseCase);
-                    Dfs(conditionalJumpNode.TrueCase);
-                    break;
+                // a conditional jump falls through to at most one of its successors
+                if (!fallsThrough && ReferenceEquals(successor, placedNext))
+                {
+                    fallsThrough = true;
+                    continue;
+                }
+
+                result.Add(successor);
             }
         }
 
-        Dfs(root);
+        foreach (var node in layout.Where(result.Contains))
+        {
+            _labelGenerator.GetLabel(node);
+        }
 
-        result.UnionWith(inDegreeHigherThanOne);
-        result.UnionWith(conditionalNodeChildren);
-        result.Add(root);
         return result;
     }
 
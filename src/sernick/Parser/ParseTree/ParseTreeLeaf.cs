@@ -12,5 +12,5 @@ public sealed record ParseTreeLeaf<TSymbol>(
     public bool Equals(ParseTreeLeaf<TSymbol>? other) => Symbol.Equals(other?.Symbol);
     public bool Equals(IParseTree<TSymbol>? other) => Equals(other as ParseTreeLeaf<TSymbol>);
     public override int GetHashCode() => Symbol.GetHashCode();
-    public IReadOnlyList<IParseTree<TSymbol>> Children => Enumerable.Empty<IParseTree<TSymbol>>().ToList();
+    public IReadOnlyList<IParseTree<TSymbol>> Children => Array.Empty<IParseTree<TSymbol>>();
 }
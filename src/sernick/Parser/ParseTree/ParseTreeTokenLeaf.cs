@@ -0,0 +1,41 @@
+namespace sernick.Parser.ParseTree;
+
+using Input;
+using Tokenizer;
+using Utility;
+
+/// <summary>
+/// Leaf of a parse tree which refers to a token stored in a <see cref="TokenBuffer{TCat}"/> by its index.
+/// Its location range is read from the buffer only when requested.
+/// Equality works the same way as for <see cref="ParseTreeLeaf{TSymbol}"/>: two leaves are equal if their symbols are.
+/// </summary>
+public sealed class ParseTreeTokenLeaf<TSymbol, TCat> : IParseTree<TSymbol>
+    where TSymbol : class, IEquatable<TSymbol>
+{
+    private readonly TokenBuffer<TCat> _tokens;
+
+    public ParseTreeTokenLeaf(TSymbol symbol, TokenBuffer<TCat> tokens, int index)
+    {
+        Symbol = symbol;
+        _tokens = tokens;
+        Index = index;
+    }
+
+    public TSymbol Symbol { get; }
+
+    /// <summary>
+    /// Index of the token in the buffer
+    /// </summary>
+    public int Index { get; }
+
+    public Range<ILocation> LocationRange => _tokens.LocationRange(Index);
+
+    public IReadOnlyList<IParseTree<TSymbol>> Children => Array.Empty<IParseTree<TSymbol>>();
+
+    public bool Equals(IParseTree<TSymbol>? other) =>
+        other is ParseTreeTokenLeaf<TSymbol, TCat> leaf && Symbol.Equals(leaf.Symbol);
+
+    public override bool Equals(object? obj) => Equals(obj as IParseTree<TSymbol>);
+    public override int GetHashCode() => Symbol.GetHashCode();
+    public override string ToString() => $"{Symbol}";
+}
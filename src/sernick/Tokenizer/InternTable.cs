@@ -0,0 +1,28 @@
+namespace sernick.Tokenizer;
+
+/// <summary>
+/// Assigns consecutive ids to distinct strings, so that every distinct token text
+/// (identifier, keyword, literal, ...) is stored only once, no matter how many times it occurs in the source
+/// </summary>
+public sealed class InternTable
+{
+    private readonly Dictionary<string, int> _ids = new();
+    private readonly List<string> _texts = new();
+
+    public int Count => _texts.Count;
+
+    public string this[int id] => _texts[id];
+
+    /// <returns>Id of <paramref name="text"/>, the same for all equal strings</returns>
+    public int Intern(string text)
+    {
+        if (!_ids.TryGetValue(text, out var id))
+        {
+            id = _texts.Count;
+            _ids[text] = id;
+            _texts.Add(text);
+        }
+
+        return id;
+    }
+}
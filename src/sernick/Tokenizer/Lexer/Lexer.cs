@@ -22,7 +22,6 @@ public sealed class Lexer<TCat, TState> : ILexer<TCat>
 
         var lastAcceptingStart = input.Start;
         LexerProcessingState? lastAcceptingState = null;
-        var text = "";
         var textBuilder = new StringBuilder();
 
         // loop over the input
@@ -35,7 +34,8 @@ public sealed class Lexer<TCat, TState> : ILexer<TCat>
                     // return the matching token category with the highest priority for this match
                     var matchingCategory = _sumDfa.AcceptingCategories(lastAcceptingState.DfaStates).Min()!;
                     // matching category is non-null, since `_sumDfa` accepted `lastAcceptingState`
-                    yield return new Token<TCat>(matchingCategory, text, (lastAcceptingStart, lastAcceptingState.Location));
+                    yield return new Token<TCat>(matchingCategory, textBuilder.ToString(0, lastAcceptingState.TextLength),
+                        (lastAcceptingStart, lastAcceptingState.Location));
 
                     // reset the input to the last end of the match
                     input.MoveTo(lastAcceptingState.Location);
@@ -76,11 +76,12 @@ public sealed class Lexer<TCat, TState> : ILexer<TCat>
             var anyAccepts = _sumDfa.Accepts(currentState);
             if (anyAccepts)
             {
+                // the text is only built once the match is complete
                 lastAcceptingState = new LexerProcessingState(
                     DfaStates: currentState,
-                    Location: input.CurrentLocation
+                    Location: input.CurrentLocation,
+                    TextLength: textBuilder.Length
                 );
-                text = textBuilder.ToString();
             }
         }
 
@@ -93,8 +94,9 @@ public sealed class Lexer<TCat, TState> : ILexer<TCat>
         // return the matching token category with the highest priority for this match
         var category = _sumDfa.AcceptingCategories(lastAcceptingState.DfaStates).Min()!;
         // matching category is non-null, since `_sumDfa` accepted `lastAcceptingState`
-        yield return new Token<TCat>(category, text, (lastAcceptingStart, lastAcceptingState.Location));
+        yield return new Token<TCat>(category, textBuilder.ToString(0, lastAcceptingState.TextLength),
+            (lastAcceptingStart, lastAcceptingState.Location));
     }
 
-    private sealed record LexerProcessingState(SumDfa<TCat, TState, char>.State DfaStates, ILocation Location);
+    private sealed record LexerProcessingState(SumDfa<TCat, TState, char>.State DfaStates, ILocation Location, int TextLength);
 }
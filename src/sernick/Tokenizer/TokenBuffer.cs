@@ -0,0 +1,42 @@
+namespace sernick.Tokenizer;
+
+using Input;
+using Utility;
+
+/// <summary>
+/// Compact storage of tokens, kept as parallel arrays instead of a <see cref="Token{TCat}"/> object per token.
+/// Texts are interned in <see cref="Texts"/>, and location ranges are only created when requested.
+/// Tokens are referred to by their index in the buffer.
+/// </summary>
+public sealed class TokenBuffer<TCat>
+{
+    private readonly List<TCat> _categories = new();
+    private readonly List<int> _textIds = new();
+    private readonly List<ILocation> _starts = new();
+    private readonly List<ILocation> _ends = new();
+
+    public InternTable Texts { get; } = new();
+
+    public int Count => _categories.Count;
+
+    /// <returns>Index of the added token</returns>
+    public int Add(Token<TCat> token)
+    {
+        _categories.Add(token.Category);
+        _textIds.Add(Texts.Intern(token.Text));
+        _starts.Add(token.LocationRange.Start);
+        _ends.Add(token.LocationRange.End);
+        return _categories.Count - 1;
+    }
+
+    public TCat Category(int index) => _categories[index];
+
+    /// <summary>
+    /// Id of the token's text in <see cref="Texts"/>; equal texts have equal ids
+    /// </summary>
+    public int TextId(int index) => _textIds[index];
+
+    public string Text(int index) => Texts[_textIds[index]];
+
+    public Range<ILocation> LocationRange(int index) => new(_starts[index], _ends[index]);
+}
@@ -100,6 +100,22 @@ public class LivenessAnalyzerTest
         Assert.Single(copyGraph[x], y);
     }
 
+    [Fact]
+    public void CopiesOfDeadRegistersAreCopies()
+    {
+        var instructions = new List<IInstruction>
+        {
+            new MovInstruction(x.AsRegOperand(), constant.AsOperand()),
+            new MovInstruction(y.AsRegOperand(), x.AsRegOperand()),
+            new MovInstruction(constant.AsOperand(), y.AsRegOperand())
+        };
+
+        var (interferenceGraph, copyGraph) = LivenessAnalyzer.Process(instructions);
+
+        Assert.Empty(interferenceGraph[x]);
+        Assert.Single(copyGraph[x], y);
+    }
+
     [Fact]
     public void ConditionalDefinitionsInterfere()
     {
@@ -79,4 +79,30 @@ public class SpillsAllocatorTest
 
         Assert.Single(newAsm, instruction);
     }
+
+    [Fact]
+    public void Doesnt_spill_reserved_registers()
+    {
+        var reservedRegister = (FakeHardwareRegister)"A";
+        var fromRegister = new Register();
+        var instruction = MovInstruction.ToReg(reservedRegister).FromReg(fromRegister);
+        var covering = new InstructionCovering(SernickInstructionSet.Rules);
+
+        var functionContext = new Mock<IFunctionContext>();
+
+        var spillsAllocator = new SpillsAllocator(new[] { reservedRegister }, covering);
+
+        // reserved registers are left unallocated by the allocator, which doesn't know them
+        var incompleteAllocation = new Dictionary<Register, HardwareRegister?>
+        {
+            { reservedRegister, null },
+            { fromRegister, (FakeHardwareRegister)"B" }
+        };
+        var asm = new IAsmable[] { instruction };
+        var (newAsm, allocation) = spillsAllocator.Process(asm, functionContext.Object, incompleteAllocation);
+
+        Assert.Single(newAsm, instruction);
+        Assert.Equal(reservedRegister, allocation[reservedRegister]);
+        functionContext.Verify(fc => fc.AllocateStackFrameSlot(), Times.Never);
+    }
 }
@@ -111,8 +111,8 @@ public class FunctionContextGenerateVariableAccessTest
 
         var readCodeTree = context.GenerateVariableRead(variable);
 
-        var readDisplay = Mem(displayAddress + 0).Read();
-        var expectedTree = Mem(readDisplay - 8).Read();
+        var framePointer = LoadedOuterFramePointer(context, displayAddress + 0);
+        var expectedTree = Mem(Reg(framePointer).Read() - 8).Read();
         Assert.Equal(expectedTree, readCodeTree);
     }
 
@@ -129,8 +129,60 @@ public class FunctionContextGenerateVariableAccessTest
 
         var readCodeTree = context.GenerateVariableWrite(variable, value);
 
-        var readDisplay = Mem(displayAddress + 0).Read();
-        var expectedTree = Mem(readDisplay - 8).Write(value);
+        var framePointer = LoadedOuterFramePointer(context, displayAddress + 0);
+        var expectedTree = Mem(Reg(framePointer).Read() - 8).Write(value);
         Assert.Equal(expectedTree, readCodeTree);
     }
+
+    [Fact]
+    public void Loads_outer_frame_address_once()
+    {
+        var varX = Var("x");
+        var varY = Var("y");
+        var value = new Constant(new RegisterValue(1));
+        var displayAddress = new GlobalAddress(DisplayTable.DISPLAY_TABLE_SYMBOL);
+
+        var parentContext = new FunctionContext(null, Array.Empty<IFunctionParam>(), false, "");
+        parentContext.AddLocal(varX, true);
+        parentContext.AddLocal(varY, true);
+        var context = new FunctionContext(parentContext, Array.Empty<IFunctionParam>(), false, "");
+
+        var readCodeTree = context.GenerateVariableRead(varX);
+        var writeCodeTree = context.GenerateVariableWrite(varY, value);
+
+        var framePointer = LoadedOuterFramePointer(context, displayAddress + 0);
+        Assert.Equal(Mem(Reg(framePointer).Read() - 8).Read(), readCodeTree);
+        Assert.Equal(Mem(Reg(framePointer).Read() - 16).Write(value), writeCodeTree);
+    }
+
+    [Fact]
+    public void Updates_display_only_if_frame_is_accessed_by_nested_functions()
+    {
+        var varX = Var("x");
+        var varY = Var("y");
+        var displayAddress = new GlobalAddress(DisplayTable.DISPLAY_TABLE_SYMBOL);
+
+        var sharingContext = new FunctionContext(null, Array.Empty<IFunctionParam>(), false, "");
+        sharingContext.AddLocal(varX, true);
+        var exclusiveContext = new FunctionContext(null, Array.Empty<IFunctionParam>(), false, "");
+        exclusiveContext.AddLocal(varY);
+
+        var displayUpdate = Mem(displayAddress + 0).Write(Reg(HardwareRegister.RBP).Read());
+        Assert.Contains(displayUpdate, Operations(sharingContext.GeneratePrologue()));
+        Assert.DoesNotContain(displayUpdate, Operations(exclusiveContext.GeneratePrologue()));
+        Assert.DoesNotContain(Operations(exclusiveContext.GenerateEpilogue(null)), operation => operation is MemoryWrite);
+    }
+
+    private static IEnumerable<CodeTreeNode> Operations(IEnumerable<SingleExitNode> nodes) =>
+        nodes.SelectMany(node => node.Operations);
+
+    /// <summary>
+    /// Register, to which the prologue of <paramref name="context"/> loads the frame address from <paramref name="displayEntry"/>
+    /// </summary>
+    private static Register LoadedOuterFramePointer(IFunctionContext context, CodeTreeValueNode displayEntry)
+    {
+        var load = Assert.Single(Operations(context.GeneratePrologue()).OfType<RegisterWrite>(),
+            write => write.Value.Equals(Mem(displayEntry).Read()));
+        return load.Register;
+    }
 }
@@ -53,7 +53,7 @@ public sealed class FakeFunctionContext : IFunctionContext
         throw new NotImplementedException();
     }
 
-    CodeTreeValueNode IFunctionContext.GetIndirectVariableLocation(IFunctionVariable variable)
+    CodeTreeValueNode IFunctionContext.GetIndirectVariableLocation(IFunctionVariable variable, Func<int, CodeTreeValueNode> frameAddress)
     {
         throw new NotImplementedException();
     }
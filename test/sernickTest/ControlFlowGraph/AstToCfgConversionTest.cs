@@ -14,13 +14,10 @@ using sernick.CodeGeneration;
 using sernick.Compiler.Function;
 using sernick.ControlFlowGraph.CodeTree;
 using static Ast.Helpers.AstNodesExtensions;
-using static sernick.Compiler.PlatformConstants;
 using static sernick.ControlFlowGraph.CodeTree.CodeTreeExtensions;
 
 public class AstToCfgConversionTest
 {
-    private readonly CodeTreeValueNode _displayAddress = new GlobalAddress(DisplayTable.DISPLAY_TABLE_SYMBOL);
-
     [Fact]
     public void SimpleAddition()
     {
@@ -317,9 +314,6 @@ public class AstToCfgConversionTest
             "f1".Call().Argument(Literal(1))
         );
 
-        var varV1 = Mem(Mem(_displayAddress + 1 * POINTER_SIZE).Value - 8);
-        var varV2 = Mem(Mem(_displayAddress + 2 * POINTER_SIZE).Value - 8);
-        var varV3 = Mem(Mem(_displayAddress + 3 * POINTER_SIZE).Value - 8);
         var varV4 = Reg(new Register());
         var varVLocal = Mem(Reg(HardwareRegister.RBP).Value - 8);
 
@@ -337,6 +331,14 @@ public class AstToCfgConversionTest
         f1Context.AddLocal(v1, true);
         f2Context.AddLocal(v2, true);
         f3Context.AddLocal(v3, true);
+
+        var varV1InF2 = OuterVariable(f2Context, v1);
+        var varV1InF3 = OuterVariable(f3Context, v1);
+        var varV2InF3 = OuterVariable(f3Context, v2);
+        var varV1InF4 = OuterVariable(f4Context, v1);
+        var varV2InF4 = OuterVariable(f4Context, v2);
+        var varV3InF4 = OuterVariable(f4Context, v3);
+
         var f1Result = Reg(new Register());
         var f2Result = Reg(new Register());
         var f3Result = Reg(new Register());
@@ -346,7 +348,7 @@ public class AstToCfgConversionTest
         var f2Call = f2Context.GenerateCall(new[] { varVLocal.Value });
         var f3Call = f3Context.GenerateCall(new[] { varVLocal.Value });
         var f4Call = f4Context.GenerateCall(new[] { varVLocal.Value });
-        var f2Callv3 = f2Context.GenerateCall(new[] { varV3.Value });
+        var f2Callv3 = f2Context.GenerateCall(new[] { varV3InF4.Value });
 
         var mainEpilogue = mainContext.GenerateEpilogue(null)[0];
         var f1Epilogue = f1Context.GenerateEpilogue(f1Result.Value)[0];
@@ -356,18 +358,18 @@ public class AstToCfgConversionTest
 
         var f4Ret = new SingleExitNode(f4Epilogue, f4Result.Write(f2Callv3.ResultLocation!));
         f2Callv3.CodeGraph[^1].NextTree = f4Ret;
-        var v1v4 = new SingleExitNode(f2Callv3.CodeGraph[0], varV1.Write(varV4.Value));
-        var v4Def = new SingleExitNode(v1v4, varV4.Write(varV1.Value + varV2.Value + varV3.Value + f4Context.GenerateVariableRead(paramP4)));
+        var v1v4 = new SingleExitNode(f2Callv3.CodeGraph[0], varV1InF4.Write(varV4.Value));
+        var v4Def = new SingleExitNode(v1v4, varV4.Write(varV1InF4.Value + varV2InF4.Value + varV3InF4.Value + f4Context.GenerateVariableRead(paramP4)));
 
         var f3Ret = new SingleExitNode(f3Epilogue, f3Result.Write(f4Call.ResultLocation!));
         f4Call.CodeGraph[^1].NextTree = f3Ret;
-        var v2Plusv3 = new SingleExitNode(f4Call.CodeGraph[0], varV2.Write(varV2.Value + varVLocal.Value));
-        var v3Def = new SingleExitNode(v2Plusv3, varVLocal.Write(varV1.Value + varV2.Value + f3Context.GenerateVariableRead(paramP3)));
+        var v2Plusv3 = new SingleExitNode(f4Call.CodeGraph[0], varV2InF3.Write(varV2InF3.Value + varVLocal.Value));
+        var v3Def = new SingleExitNode(v2Plusv3, varVLocal.Write(varV1InF3.Value + varV2InF3.Value + f3Context.GenerateVariableRead(paramP3)));
 
         var f2Ret = new SingleExitNode(f2Epilogue, f2Result.Write(f3Call.ResultLocation!));
         f3Call.CodeGraph[^1].NextTree = f2Ret;
-        var v1Plusv2 = new SingleExitNode(f3Call.CodeGraph[0], varV1.Write(varV1.Value + varVLocal.Value));
-        var v2Def = new SingleExitNode(v1Plusv2, varVLocal.Write(varV1.Value + f2Context.GenerateVariableRead(paramP2)));
+        var v1Plusv2 = new SingleExitNode(f3Call.CodeGraph[0], varV1InF2.Write(varV1InF2.Value + varVLocal.Value));
+        var v2Def = new SingleExitNode(v1Plusv2, varVLocal.Write(varV1InF2.Value + f2Context.GenerateVariableRead(paramP2)));
 
         var f1Ret = new SingleExitNode(f1Epilogue, f1Result.Write(f2Call.ResultLocation!));
         f2Call.CodeGraph[^1].NextTree = f1Ret;
@@ -651,7 +653,6 @@ public class AstToCfgConversionTest
             "f".Call().Argument(Literal(true))
         );
 
-        var varX = Mem(Mem(_displayAddress + 0 * POINTER_SIZE).Value - 8);
         var varXLocal = Mem(Reg(HardwareRegister.RBP).Value - 8);
 
         var funFactory = new FunctionFactory(LabelGenerator.Generate);
@@ -663,6 +664,9 @@ public class AstToCfgConversionTest
         mainContext.AddLocal(x, true);
         fContext.AddLocal(paramV);
 
+        var varXInG = OuterVariable(gContext, x);
+        var varXInH = OuterVariable(hContext, x);
+
         var fCallInMain = fContext.GenerateCall(new[] { new Constant(new RegisterValue(1)) });
         var fCallInG = fContext.GenerateCall(new[] { new Constant(new RegisterValue(0)) });
         var fCallInH = fContext.GenerateCall(new[] { new Constant(new RegisterValue(1)) });
@@ -684,9 +688,9 @@ public class AstToCfgConversionTest
         var condEval = new SingleExitNode(ifBlock, tmpReg.Write(fContext.GenerateVariableRead(paramV)));
 
         fCallInH.CodeGraph[^1].NextTree = hEpilogue;
-        var xMinus1 = new SingleExitNode(fCallInH.CodeGraph[0], varX.Write(varX.Value - 1));
+        var xMinus1 = new SingleExitNode(fCallInH.CodeGraph[0], varXInH.Write(varXInH.Value - 1));
         fCallInG.CodeGraph[^1].NextTree = gEpilogue;
-        var xPlus1 = new SingleExitNode(fCallInG.CodeGraph[0], varX.Write(varX.Value + 1));
+        var xPlus1 = new SingleExitNode(fCallInG.CodeGraph[0], varXInG.Write(varXInG.Value + 1));
 
         var mainRoot = AddPrologue(mainContext, x1);
         var fRoot = AddPrologue(fContext, condEval);
@@ -747,7 +751,6 @@ public class AstToCfgConversionTest
             )
         );
 
-        var varX = Mem(Mem(_displayAddress + 0 * POINTER_SIZE).Value - 8);
         var varXLocal = Mem(Reg(HardwareRegister.RBP).Value - 8);
         var varY = Reg(new Register());
 
@@ -759,6 +762,10 @@ public class AstToCfgConversionTest
         mainContext.AddLocal(x, true);
         fContext.AddLocal(paramVf);
         gContext.AddLocal(paramVg);
+
+        var varXInF = OuterVariable(fContext, x);
+        var varXInG = OuterVariable(gContext, x);
+
         var fResult = Reg(new Register());
         var gResult = Reg(new Register());
 
@@ -783,10 +790,10 @@ public class AstToCfgConversionTest
         loopBlock.NextTree = fCall.CodeGraph[0];
         var xy = new SingleExitNode(loopBlock, new CodeTreeNode[] { varXLocal.Write(1), varY.Write(0) });
 
-        var gRet = new SingleExitNode(gEpilogue, gResult.Write(gContext.GenerateVariableRead(paramVg) <= varX.Value));
-        var xPlus1InG = new SingleExitNode(gRet, varX.Write(varX.Value + 1));
+        var gRet = new SingleExitNode(gEpilogue, gResult.Write(gContext.GenerateVariableRead(paramVg) <= varXInG.Value));
+        var xPlus1InG = new SingleExitNode(gRet, varXInG.Write(varXInG.Value + 1));
         var fRet = new SingleExitNode(fEpilogue, fResult.Write(fContext.GenerateVariableRead(paramVf) <= 5));
-        var xPlus1InF = new SingleExitNode(fRet, varX.Write(varX.Value + 1));
+        var xPlus1InF = new SingleExitNode(fRet, varXInF.Write(varXInF.Value + 1));
 
         var mainRoot = AddPrologue(mainContext, xy);
         var fRoot = AddPrologue(fContext, xPlus1InF);
@@ -845,7 +852,6 @@ public class AstToCfgConversionTest
             )
         );
 
-        var varX = Mem(Mem(_displayAddress + 0 * POINTER_SIZE).Value - 8);
         var varXLocal = Mem(Reg(HardwareRegister.RBP).Value - 8);
         var varY = Reg(new Register());
 
@@ -857,6 +863,10 @@ public class AstToCfgConversionTest
         mainContext.AddLocal(x, true);
         fContext.AddLocal(paramVf);
         gContext.AddLocal(paramVg);
+
+        var varXInF = OuterVariable(fContext, x);
+        var varXInG = OuterVariable(gContext, x);
+
         var fResult = Reg(new Register());
         var gResult = Reg(new Register());
 
@@ -881,10 +891,10 @@ public class AstToCfgConversionTest
         loopBlock.NextTree = fCall.CodeGraph[0];
         var xy = new SingleExitNode(loopBlock, new CodeTreeNode[] { varXLocal.Write(1), varY.Write(0) });
 
-        var gRet = new SingleExitNode(gEpilogue, gResult.Write(gContext.GenerateVariableRead(paramVg) <= varX.Value));
-        var xPlus1InG = new SingleExitNode(gRet, varX.Write(varX.Value + 1));
+        var gRet = new SingleExitNode(gEpilogue, gResult.Write(gContext.GenerateVariableRead(paramVg) <= varXInG.Value));
+        var xPlus1InG = new SingleExitNode(gRet, varXInG.Write(varXInG.Value + 1));
         var fRet = new SingleExitNode(fEpilogue, fResult.Write(fContext.GenerateVariableRead(paramVf) <= 5));
-        var xPlus1InF = new SingleExitNode(fRet, varX.Write(varX.Value + 1));
+        var xPlus1InF = new SingleExitNode(fRet, varXInF.Write(varXInF.Value + 1));
 
         var mainRoot = AddPrologue(mainContext, xy);
         var fRoot = AddPrologue(fContext, xPlus1InF);
@@ -950,7 +960,6 @@ public class AstToCfgConversionTest
             )
         );
 
-        var varX = Mem(Mem(_displayAddress + 0 * POINTER_SIZE).Value - 8);
         var varXLocal = Mem(Reg(HardwareRegister.RBP).Value - 8);
         var varY = Reg(new Register());
 
@@ -964,6 +973,10 @@ public class AstToCfgConversionTest
         fContext.AddLocal(paramVf);
         gContext.AddLocal(paramVg);
         hContext.AddLocal(paramVh);
+
+        var varXInG = OuterVariable(gContext, x);
+        var varXInH = OuterVariable(hContext, x);
+
         var fResult = Reg(new Register());
         var gResult = Reg(new Register());
         var hResult = Reg(new Register());
@@ -994,8 +1007,8 @@ public class AstToCfgConversionTest
         loopBlock.NextTree = fCall.CodeGraph[0];
         var xy = new SingleExitNode(loopBlock, new CodeTreeNode[] { varXLocal.Write(10), varY.Write(0) });
 
-        var hRet = new SingleExitNode(hEpilogue, hResult.Write(varX.Value <= hContext.GenerateVariableRead(paramVh)));
-        var gRet = new SingleExitNode(gEpilogue, gResult.Write(gContext.GenerateVariableRead(paramVg) <= varX.Value));
+        var hRet = new SingleExitNode(hEpilogue, hResult.Write(varXInH.Value <= hContext.GenerateVariableRead(paramVh)));
+        var gRet = new SingleExitNode(gEpilogue, gResult.Write(gContext.GenerateVariableRead(paramVg) <= varXInG.Value));
         var fRet = new SingleExitNode(fEpilogue, fResult.Write(fContext.GenerateVariableRead(paramVf) <= 5));
 
         var mainRoot = AddPrologue(mainContext, xy);
@@ -1043,7 +1056,6 @@ public class AstToCfgConversionTest
             Var<IntType>("y", "f".Call().Get(out _).Plus("g".Call()))
         );
 
-        var varX = Mem(Mem(_displayAddress + 0 * POINTER_SIZE).Value - 8);
         var varXLocal = Mem(Reg(HardwareRegister.RBP).Value - 8);
         var varY = Reg(new Register());
 
@@ -1053,6 +1065,10 @@ public class AstToCfgConversionTest
         var gContext = funFactory.CreateFunction(mainContext, Ident("g"), null, Array.Empty<IFunctionParam>(), true);
 
         mainContext.AddLocal(x, true);
+
+        var varXInF = OuterVariable(fContext, x);
+        var varXInG = OuterVariable(gContext, x);
+
         var fResult = Reg(new Register());
         var gResult = Reg(new Register());
 
@@ -1067,14 +1083,16 @@ public class AstToCfgConversionTest
         var yAssign = new SingleExitNode(mainEpilogue, varY.Write(fCall.ResultLocation! + gCall.ResultLocation!));
         gCall.CodeGraph[^1].NextTree = yAssign;
         fCall.CodeGraph[^1].NextTree = gCall.CodeGraph[0];
-        var xMainAssign = new SingleExitNode(fCall.CodeGraph[0], varXLocal.Write(0));
+        // the call without arguments starts with the call itself, so it's merged with the preceding tree
+        var xMainAssign = new SingleExitNode(fCall.CodeGraph[0].NextTree,
+            fCall.CodeGraph[0].Operations.Prepend(varXLocal.Write(0)).ToList());
 
         // f
-        var fRet = new SingleExitNode(fEpilogue, fResult.Write(varX.Value));
-        var xFInc = new SingleExitNode(fRet, varX.Write(varX.Value + 1));
+        var fRet = new SingleExitNode(fEpilogue, fResult.Write(varXInF.Value));
+        var xFInc = new SingleExitNode(fRet, varXInF.Write(varXInF.Value + 1));
 
         // g
-        var gRet = new SingleExitNode(gEpilogue, gResult.Write(varX.Value));
+        var gRet = new SingleExitNode(gEpilogue, gResult.Write(varXInG.Value));
 
         // add prologue
         var mainRoot = AddPrologue(mainContext, xMainAssign);
@@ -1148,7 +1166,6 @@ public class AstToCfgConversionTest
             )
         );
 
-        var varX = Mem(Mem(_displayAddress + 0 * POINTER_SIZE).Value - 8);
         var varXLocal = Mem(Reg(HardwareRegister.RBP).Value - 8);
         var varY = Reg(new Register());
 
@@ -1160,6 +1177,12 @@ public class AstToCfgConversionTest
         var f4Context = funFactory.CreateFunction(mainContext, Ident("f4"), null, Array.Empty<IFunctionParam>(), true);
 
         mainContext.AddLocal(x, true);
+
+        var varXInF1 = OuterVariable(f1Context, x);
+        var varXInF2 = OuterVariable(f2Context, x);
+        var varXInF3 = OuterVariable(f3Context, x);
+        var varXInF4 = OuterVariable(f4Context, x);
+
         var f1Result = Reg(new Register());
         var f2Result = Reg(new Register());
         var f3Result = Reg(new Register());
@@ -1187,23 +1210,25 @@ public class AstToCfgConversionTest
         f3Call.CodeGraph[^1].NextTree = f4Call.CodeGraph[0];
         f2Call.CodeGraph[^1].NextTree = f3Call.CodeGraph[0];
         f1Call.CodeGraph[^1].NextTree = f2Call.CodeGraph[0];
-        var xMainAssign = new SingleExitNode(f1Call.CodeGraph[0], varXLocal.Write(0));
+        // the call without arguments starts with the call itself, so it's merged with the preceding tree
+        var xMainAssign = new SingleExitNode(f1Call.CodeGraph[0].NextTree,
+            f1Call.CodeGraph[0].Operations.Prepend(varXLocal.Write(0)).ToList());
 
         // f1
-        var f1Ret = new SingleExitNode(f1Epilogue, f1Result.Write(varX.Value));
-        var xF1Inc = new SingleExitNode(f1Ret, varX.Write(varX.Value + 1));
+        var f1Ret = new SingleExitNode(f1Epilogue, f1Result.Write(varXInF1.Value));
+        var xF1Inc = new SingleExitNode(f1Ret, varXInF1.Write(varXInF1.Value + 1));
 
         // f2
-        var f2Ret = new SingleExitNode(f2Epilogue, f2Result.Write(varX.Value));
-        var xF2Inc = new SingleExitNode(f2Ret, varX.Write(varX.Value + 2));
+        var f2Ret = new SingleExitNode(f2Epilogue, f2Result.Write(varXInF2.Value));
+        var xF2Inc = new SingleExitNode(f2Ret, varXInF2.Write(varXInF2.Value + 2));
 
         // f3
-        var f3Ret = new SingleExitNode(f3Epilogue, f3Result.Write(varX.Value));
-        var xF3Inc = new SingleExitNode(f3Ret, varX.Write(varX.Value + 3));
+        var f3Ret = new SingleExitNode(f3Epilogue, f3Result.Write(varXInF3.Value));
+        var xF3Inc = new SingleExitNode(f3Ret, varXInF3.Write(varXInF3.Value + 3));
 
         // f4
-        var f4Ret = new SingleExitNode(f4Epilogue, f4Result.Write(varX.Value));
-        var xF4Inc = new SingleExitNode(f4Ret, varX.Write(varX.Value + 4));
+        var f4Ret = new SingleExitNode(f4Epilogue, f4Result.Write(varXInF4.Value));
+        var xF4Inc = new SingleExitNode(f4Ret, varXInF4.Write(varXInF4.Value + 4));
 
         // add prologue
         var mainRoot = AddPrologue(mainContext, xMainAssign);
@@ -1268,7 +1293,6 @@ public class AstToCfgConversionTest
             Var<IntType>("y", "f".Call().Argument("g".Call()).Argument("h".Call()))
         );
 
-        var varX = Mem(Mem(_displayAddress + 0 * POINTER_SIZE).Value - 8);
         var varXLocal = Mem(Reg(HardwareRegister.RBP).Value - 8);
         var varY = Reg(new Register());
 
@@ -1281,6 +1305,10 @@ public class AstToCfgConversionTest
         mainContext.AddLocal(x, true);
         fContext.AddLocal(paramA);
         fContext.AddLocal(paramB);
+
+        var varXInG = OuterVariable(gContext, x);
+        var varXInH = OuterVariable(hContext, x);
+
         var fResult = Reg(new Register());
         var gResult = Reg(new Register());
         var hResult = Reg(new Register());
@@ -1299,18 +1327,20 @@ public class AstToCfgConversionTest
         fCall.CodeGraph[^1].NextTree = yAssign;
         hCall.CodeGraph[^1].NextTree = fCall.CodeGraph[0];
         gCall.CodeGraph[^1].NextTree = hCall.CodeGraph[0];
-        var xMainAssign = new SingleExitNode(gCall.CodeGraph[0], varXLocal.Write(0));
+        // the call without arguments starts with the call itself, so it's merged with the preceding tree
+        var xMainAssign = new SingleExitNode(gCall.CodeGraph[0].NextTree,
+            gCall.CodeGraph[0].Operations.Prepend(varXLocal.Write(0)).ToList());
 
         // f
         var fRet = new SingleExitNode(fEpilogue, fResult.Write(fContext.GenerateVariableRead(paramA) + fContext.GenerateVariableRead(paramB)));
 
         // g
-        var gRet = new SingleExitNode(gEpilogue, gResult.Write(varX.Value));
-        var xGInc = new SingleExitNode(gRet, varX.Write(varX.Value + 1));
+        var gRet = new SingleExitNode(gEpilogue, gResult.Write(varXInG.Value));
+        var xGInc = new SingleExitNode(gRet, varXInG.Write(varXInG.Value + 1));
 
         // h
-        var hRet = new SingleExitNode(hEpilogue, hResult.Write(varX.Value));
-        var xHInc = new SingleExitNode(hRet, varX.Write(varX.Value + 2));
+        var hRet = new SingleExitNode(hEpilogue, hResult.Write(varXInH.Value));
+        var xHInc = new SingleExitNode(hRet, varXInH.Write(varXInH.Value + 2));
 
         // add prologue
         var mainRoot = AddPrologue(mainContext, xMainAssign);
@@ -1348,6 +1378,12 @@ public class AstToCfgConversionTest
         }
     }
 
+    /// <summary>
+    /// Location of a variable of an enclosing function, addressed through the frame address cached by <paramref name="context"/>
+    /// </summary>
+    private static MemoryReference OuterVariable(IFunctionContext context, IFunctionVariable variable) =>
+        Mem(Assert.IsType<MemoryRead>(context.GenerateVariableRead(variable)).MemoryLocation);
+
     private static CodeTreeRoot AddPrologue(IFunctionContext context, CodeTreeRoot graphRoot)
     {
         var prologue = context.GeneratePrologue();
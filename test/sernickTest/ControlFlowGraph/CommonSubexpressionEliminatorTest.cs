@@ -0,0 +1,186 @@
+namespace sernickTest.ControlFlowGraph;
+
+using sernick.CodeGeneration;
+using sernick.Compiler.Function;
+using sernick.ControlFlowGraph.Analysis;
+using sernick.ControlFlowGraph.CodeTree;
+using static sernick.ControlFlowGraph.CodeTree.CodeTreeExtensions;
+
+public class CommonSubexpressionEliminatorTest
+{
+    private readonly Register _x = new();
+    private readonly Register _y = new();
+    private readonly Register _a = new();
+    private readonly Register _b = new();
+
+    [Fact]
+    public void ReusesValueComputedInTheSameTree()
+    {
+        var root = Sequence(
+            Reg(_a).Write(Reg(_x).Read() * Reg(_y).Read()),
+            Reg(_b).Write(Reg(_y).Read() * Reg(_x).Read() + 1));
+
+        var temp = Reg(new Register());
+        var expected = Sequence(
+            temp.Write(Reg(_x).Read() * Reg(_y).Read()),
+            Reg(_a).Write(temp.Read()),
+            Reg(_b).Write(temp.Read() + 1));
+
+        var eliminator = new CommonSubexpressionEliminator();
+        Assert.Equal(expected, eliminator.Process(root), new CfgIsomorphismComparer());
+        Assert.Equal(1, eliminator.EliminatedComputations);
+    }
+
+    [Fact]
+    public void ReusesValueAlongStraightLineCode()
+    {
+        var structAddress = Mem(Reg(_x).Read()).Read();
+        var root = Chain(
+            new SingleExitNode(null, Reg(_a).Write(Mem(structAddress + 8).Read())),
+            new SingleExitNode(null, Reg(_b).Write(Mem(structAddress + 16).Read())));
+
+        var temp = Reg(new Register());
+        var expected = Chain(
+            new SingleExitNode(null, new CodeTreeNode[]
+            {
+                temp.Write(Mem(Reg(_x).Read()).Read()),
+                Reg(_a).Write(Mem(temp.Read() + 8).Read())
+            }),
+            new SingleExitNode(null, Reg(_b).Write(Mem(temp.Read() + 16).Read())));
+
+        var eliminator = new CommonSubexpressionEliminator();
+        Assert.Equal(expected, eliminator.Process(root), new CfgIsomorphismComparer());
+        Assert.Equal(1, eliminator.EliminatedComputations);
+    }
+
+    [Fact]
+    public void DoesNotReuseValueAfterRegisterWrite()
+    {
+        var root = Sequence(
+            Reg(_a).Write(Reg(_x).Read() * Reg(_y).Read()),
+            Reg(_x).Write(1),
+            Reg(_b).Write(Reg(_x).Read() * Reg(_y).Read()));
+
+        var eliminator = new CommonSubexpressionEliminator();
+        Assert.Equal(root, eliminator.Process(root), new CfgIsomorphismComparer());
+        Assert.Equal(0, eliminator.EliminatedComputations);
+    }
+
+    [Fact]
+    public void DoesNotReuseMemoryReadAfterAliasingWrite()
+    {
+        var root = Sequence(
+            Reg(_a).Write(Mem(Reg(_x).Read()).Read()),
+            Mem(Reg(_y).Read()).Write(1),
+            Reg(_b).Write(Mem(Reg(_x).Read()).Read()));
+
+        var eliminator = new CommonSubexpressionEliminator();
+        Assert.Equal(root, eliminator.Process(root), new CfgIsomorphismComparer());
+        Assert.Equal(0, eliminator.EliminatedComputations);
+    }
+
+    [Fact]
+    public void ReusesMemoryReadAfterWriteToDifferentSlot()
+    {
+        var rbp = Reg(HardwareRegister.RBP);
+        var root = Sequence(
+            Reg(_a).Write(Mem(rbp.Read() - 8).Read()),
+            Mem(rbp.Read() - 16).Write(1),
+            Reg(_b).Write(Mem(rbp.Read() - 8).Read()));
+
+        var temp = Reg(new Register());
+        var expected = Sequence(
+            temp.Write(Mem(rbp.Read() - 8).Read()),
+            Reg(_a).Write(temp.Read()),
+            Mem(rbp.Read() - 16).Write(1),
+            Reg(_b).Write(temp.Read()));
+
+        var eliminator = new CommonSubexpressionEliminator();
+        Assert.Equal(expected, eliminator.Process(root), new CfgIsomorphismComparer());
+    }
+
+    [Fact]
+    public void KeepsDisplayEntriesAcrossFunctionCall()
+    {
+        var displayEntry = Mem(new GlobalAddress("display") + 8).Read();
+        var root = Sequence(
+            Reg(_a).Write(Mem(displayEntry - 8).Read()),
+            new FunctionCall(new ReadCaller()),
+            Reg(_b).Write(Mem(displayEntry - 16).Read()));
+
+        var temp = Reg(new Register());
+        var expected = Sequence(
+            temp.Write(displayEntry),
+            Reg(_a).Write(Mem(temp.Read() - 8).Read()),
+            new FunctionCall(new ReadCaller()),
+            Reg(_b).Write(Mem(temp.Read() - 16).Read()));
+
+        var eliminator = new CommonSubexpressionEliminator();
+        Assert.Equal(expected, eliminator.Process(root), new CfgIsomorphismComparer());
+    }
+
+    [Fact]
+    public void DoesNotReuseValueAtJoinPoint()
+    {
+        var join = new SingleExitNode(null, Reg(_b).Write(Reg(_x).Read() * Reg(_y).Read()));
+        var thenBranch = new SingleExitNode(join, Reg(_a).Write(1));
+        var root = new ConditionalJumpNode(thenBranch, join, Reg(_x).Read() * Reg(_y).Read());
+
+        var eliminator = new CommonSubexpressionEliminator();
+        Assert.Equal(root, eliminator.Process(root), new CfgIsomorphismComparer());
+        Assert.Equal(0, eliminator.EliminatedComputations);
+    }
+
+    [Fact]
+    public void ReusesValueInBranchWithSinglePredecessor()
+    {
+        var compute = Reg(_a).Write(Reg(_x).Read() * Reg(_y).Read());
+        var exit = new SingleExitNode(null, new FunctionReturn());
+        var root = new SingleExitNode(
+            new ConditionalJumpNode(
+                new SingleExitNode(exit, Reg(_b).Write(Reg(_x).Read() * Reg(_y).Read())),
+                exit,
+                Reg(_x).Read() * Reg(_y).Read()),
+            compute);
+
+        var temp = Reg(new Register());
+        var expectedExit = new SingleExitNode(null, new FunctionReturn());
+        var expected = new SingleExitNode(
+            new ConditionalJumpNode(
+                new SingleExitNode(expectedExit, Reg(_b).Write(temp.Read())),
+                expectedExit,
+                temp.Read()),
+            new CodeTreeNode[] { temp.Write(Reg(_x).Read() * Reg(_y).Read()), Reg(_a).Write(temp.Read()) });
+
+        var eliminator = new CommonSubexpressionEliminator();
+        Assert.Equal(expected, eliminator.Process(root), new CfgIsomorphismComparer());
+        Assert.Equal(2, eliminator.EliminatedComputations);
+    }
+
+    [Fact]
+    public void HandlesLoops()
+    {
+        var body = new SingleExitNode(null, Reg(_a).Write(Mem(Reg(_x).Read()).Read() + Mem(Reg(_x).Read()).Read()));
+        body.NextTree = body;
+
+        var eliminator = new CommonSubexpressionEliminator();
+        var result = eliminator.Process(body);
+
+        var resultBody = Assert.IsType<SingleExitNode>(result);
+        Assert.Same(resultBody, resultBody.NextTree);
+        Assert.Equal(2, resultBody.Operations.Count);
+        Assert.Equal(1, eliminator.EliminatedComputations);
+    }
+
+    private static SingleExitNode Sequence(params CodeTreeNode[] operations) => new(null, operations);
+
+    private static SingleExitNode Chain(params SingleExitNode[] nodes)
+    {
+        for (var i = 0; i + 1 < nodes.Length; i++)
+        {
+            nodes[i].NextTree = nodes[i + 1];
+        }
+
+        return nodes[0];
+    }
+}
@@ -0,0 +1,85 @@
+namespace sernickTest.ControlFlowGraph;
+
+using System.Diagnostics;
+using sernick.Compiler.Instruction;
+using sernick.ControlFlowGraph.Analysis;
+using sernick.ControlFlowGraph.CodeTree;
+using Utility;
+using Xunit.Abstractions;
+using static sernick.ControlFlowGraph.CodeTree.CodeTreeExtensions;
+
+public class InstructionCoveringBenchmark
+{
+    private readonly ITestOutputHelper _output;
+
+    public InstructionCoveringBenchmark(ITestOutputHelper output)
+    {
+        _output = output;
+    }
+
+    [PerformanceHeavyTheory]
+    [InlineData(1000)]
+    [InlineData(20000)]
+    public void CoversLargeGeneratedFunction(int treesCount)
+    {
+        var trees = GenerateFunction(treesCount);
+        var nodesCount = trees.Sum(tree => tree.Operations.Sum(CountNodes));
+        var rulesCount = SernickInstructionSet.Rules.Count();
+
+        var covering = new InstructionCovering(SernickInstructionSet.Rules);
+        var stopwatch = Stopwatch.StartNew();
+        var instructionsCount = trees.Sum(tree => covering.Cover(tree, null).Count());
+        stopwatch.Stop();
+
+        _output.WriteLine($"{treesCount} trees, {nodesCount} nodes, {instructionsCount} instructions");
+        _output.WriteLine($"{covering.RuleMatchAttempts} match attempts ({covering.RuleMatchSuccesses} successful), " +
+                          $"{nodesCount * rulesCount} without rule index");
+        _output.WriteLine($"Covered in {stopwatch.ElapsedMilliseconds} ms");
+
+        Assert.True(covering.RuleMatchAttempts * 4 < (long)nodesCount * rulesCount);
+    }
+
+    [Fact]
+    public void CountersCanBeReset()
+    {
+        var covering = new InstructionCovering(SernickInstructionSet.Rules);
+        covering.Cover(GenerateFunction(1).Single(), null);
+        Assert.True(covering.RuleMatchSuccesses > 0);
+        Assert.True(covering.RuleMatchAttempts >= covering.RuleMatchSuccesses);
+
+        covering.ResetCounters();
+        Assert.Equal(0, covering.RuleMatchAttempts);
+        Assert.Equal(0, covering.RuleMatchSuccesses);
+    }
+
+    private static IReadOnlyList<SingleExitNode> GenerateFunction(int treesCount)
+    {
+        var registers = Enumerable.Range(0, 16).Select(_ => new Register()).ToList();
+        var framePointer = Reg(HardwareRegister.RBP);
+
+        return Enumerable.Range(0, treesCount).Select(i =>
+        {
+            var a = Reg(registers[i % registers.Count]);
+            var b = Reg(registers[(i + 1) % registers.Count]);
+            var c = Reg(registers[(i + 2) % registers.Count]);
+            return new SingleExitNode(null, new List<CodeTreeNode>
+            {
+                a.Write(Mem(framePointer.Read() - 8 * (i % 64)).Read() + b.Read()),
+                Mem(framePointer.Read() - 8 * (i % 64)).Write(c.Read()),
+                c.Write((a.Read() - b.Read()) & (b.Read() | 0xff)),
+                Mem(b.Read()).Write(a.Read() < c.Read()),
+                b.Write(!Mem(a.Read() + 8).Read())
+            });
+        }).ToList();
+    }
+
+    private static int CountNodes(CodeTreeNode node) => 1 + node switch
+    {
+        BinaryOperationNode binaryNode => CountNodes(binaryNode.Left) + CountNodes(binaryNode.Right),
+        UnaryOperationNode unaryNode => CountNodes(unaryNode.Operand),
+        RegisterWrite registerWrite => CountNodes(registerWrite.Value),
+        MemoryRead memoryRead => CountNodes(memoryRead.MemoryLocation),
+        MemoryWrite memoryWrite => CountNodes(memoryWrite.MemoryLocation) + CountNodes(memoryWrite.Value),
+        _ => 0
+    };
+}
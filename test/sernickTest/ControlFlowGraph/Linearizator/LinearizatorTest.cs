@@ -20,6 +20,8 @@ public class LinearizatorTest
         public string ToAsm(IReadOnlyDictionary<Register, HardwareRegister> registerMapping) => "";
     }
 
+    private static readonly IReadOnlyList<CodeTreeNode> operationsList = new List<CodeTreeNode> { new FunctionReturn() };
+
     private static Mock<IInstructionCovering> InstructionCoveringMock()
     {
         var mockedInstructionCovering = new Mock<IInstructionCovering>();
@@ -37,11 +39,10 @@ public class LinearizatorTest
         var linearizator = new Linearizator(mockedInstructionCovering.Object);
         var startLabel = new Label("");
 
-        var emptyOperationsList = new List<CodeTreeNode>();
         // path p1 -> p2 -> p3
-        var p3 = new SingleExitNode(null, emptyOperationsList);
-        var p2 = new SingleExitNode(p3, emptyOperationsList);
-        var p1 = new SingleExitNode(p2, emptyOperationsList);
+        var p3 = new SingleExitNode(null, operationsList);
+        var p2 = new SingleExitNode(p3, operationsList);
+        var p1 = new SingleExitNode(p2, operationsList);
 
         var actual = linearizator.Linearize(p1, startLabel).ToList();
         var numUniqueNodes = 3;
@@ -62,26 +63,28 @@ public class LinearizatorTest
         var linearizator = new Linearizator(mockedInstructionCovering.Object);
         var startLabel = new Label("");
 
-        var emptyOperationsList = new List<CodeTreeNode>();
         // conditional node, in both cases we have "null" as the next node
-        var trueCaseNode = new SingleExitNode(null, emptyOperationsList);
-        var falseCaseNode = new SingleExitNode(null, emptyOperationsList);
+        var trueCaseNode = new SingleExitNode(null, operationsList);
+        var falseCaseNode = new SingleExitNode(null, operationsList);
         var mockedValueNode = new Mock<CodeTreeValueNode>();
         var conditionalNode = new ConditionalJumpNode(trueCaseNode, falseCaseNode, mockedValueNode.Object);
 
         var actual = linearizator.Linearize(conditionalNode, startLabel).ToList();
 
         var numUniqueNodes = 3;
-        var numExpectedLabels = 3;
+        var numExpectedLabels = 2;
 
         Assert.Equal(numUniqueNodes + numExpectedLabels, actual.Count);
 
         Assert.Same(startLabel, actual[0]);
         Assert.Same(conditionalNode, (actual[1] as IdentityInstructionNode)?.Node);
-        Assert.IsType<Label>(actual[2]);
-        Assert.Same(trueCaseNode, (actual[3] as IdentityInstructionNode)?.Node);
-        Assert.IsType<Label>(actual[4]);
-        Assert.Same(falseCaseNode, (actual[5] as IdentityInstructionNode)?.Node);
+
+        // true case falls through, so it doesn't need a label
+        Assert.Same(trueCaseNode, (actual[2] as IdentityInstructionNode)?.Node);
+        Assert.IsType<Label>(actual[3]);
+        Assert.Same(falseCaseNode, (actual[4] as IdentityInstructionNode)?.Node);
+
+        mockedInstructionCovering.Verify(ic => ic.Cover(conditionalNode, null, actual[3] as Label));
     }
 
     [Fact]
@@ -91,7 +94,6 @@ public class LinearizatorTest
         var linearizator = new Linearizator(mockedInstructionCovering.Object);
         var startLabel = new Label("");
 
-        var emptyOperationsList = new List<CodeTreeNode>();
         var mockedValueNode = new Mock<CodeTreeValueNode>();
 
         // conditionalNode1        
@@ -111,32 +113,30 @@ public class LinearizatorTest
         //   S1 and S2 below are independent in the graph
         //   SingleExitNode S1 -> finish
         //   SingleExitNode S2 -> finish
-        var s1 = new SingleExitNode(null, emptyOperationsList);
-        var s2 = new SingleExitNode(null, emptyOperationsList);
+        var s1 = new SingleExitNode(null, operationsList);
+        var s2 = new SingleExitNode(null, operationsList);
         var cn2 = new ConditionalJumpNode(s1, s2, mockedValueNode.Object);
         var cn1 = new ConditionalJumpNode(cn2, s1, mockedValueNode.Object);
 
         var actual = linearizator.Linearize(cn1, startLabel).ToList();
 
         var numUniqueNodes = 4;
-        var numExpectedLabels = 4;
+        var numExpectedLabels = 2;
         Assert.Equal(numUniqueNodes + numExpectedLabels, actual.Count);
 
         // CN1 
         Assert.Same(startLabel, actual[0]);
         Assert.Same(cn1, (actual[1] as IdentityInstructionNode)?.Node);
 
-        // next in DFS order is CN2, with a label
-        Assert.IsType<Label>(actual[2]);
-        Assert.Same(cn2, (actual[3] as IdentityInstructionNode)?.Node);
+        // CN2 has a single predecessor, so CN1 falls through to it
+        Assert.Same(cn2, (actual[2] as IdentityInstructionNode)?.Node);
+
+        // S1 has two predecessors and S2 only one, so CN2 falls through to S2
+        Assert.Same(s2, (actual[3] as IdentityInstructionNode)?.Node);
 
-        // next in DFS order is S1 (as child of CN2), with a label
+        // S1 is reached only by jumps, with a label
         Assert.IsType<Label>(actual[4]);
         Assert.Same(s1, (actual[5] as IdentityInstructionNode)?.Node);
-
-        // next in DFS order is S2 (as child of CN2), with a label
-        Assert.IsType<Label>(actual[6]);
-        Assert.Same(s2, (actual[7] as IdentityInstructionNode)?.Node);
     }
 
     [Fact]
@@ -146,7 +146,6 @@ public class LinearizatorTest
         var linearizator = new Linearizator(mockedInstructionCovering.Object);
         var startLabel = new Label("");
 
-        var emptyOperationsList = new List<CodeTreeNode>();
         var mockedValueNode = new Mock<CodeTreeValueNode>();
 
         //       CN1        
@@ -170,8 +169,8 @@ public class LinearizatorTest
         //   S1 and S2 below are independent in the graph
         //   SingleExitNode S1 -> finish
         //   SingleExitNode S2 -> finish
-        var s1 = new SingleExitNode(null, emptyOperationsList);
-        var s2 = new SingleExitNode(null, emptyOperationsList);
+        var s1 = new SingleExitNode(null, operationsList);
+        var s2 = new SingleExitNode(null, operationsList);
         var cn3 = new ConditionalJumpNode(s1, s2, mockedValueNode.Object);
         var cn2 = new ConditionalJumpNode(cn3, s2, mockedValueNode.Object);
         var cn1 = new ConditionalJumpNode(cn2, s1, mockedValueNode.Object);
@@ -179,7 +178,7 @@ public class LinearizatorTest
         var actual = linearizator.Linearize(cn1, startLabel).ToList();
 
         var numUniqueNodes = 5;
-        var numExpectedLabels = 5;
+        var numExpectedLabels = 3;
 
         Assert.Equal(numUniqueNodes + numExpectedLabels, actual.Count);
 
@@ -187,21 +186,17 @@ public class LinearizatorTest
         Assert.Same(startLabel, actual[0]);
         Assert.Same(cn1, (actual[1] as IdentityInstructionNode)?.Node);
 
-        // next in DFS order is CN2, with a label (child of CN1)
-        Assert.IsType<Label>(actual[2]);
-        Assert.Same(cn2, (actual[3] as IdentityInstructionNode)?.Node);
+        // CN1 falls through to CN2, and CN2 falls through to CN3
+        Assert.Same(cn2, (actual[2] as IdentityInstructionNode)?.Node);
+        Assert.Same(cn3, (actual[3] as IdentityInstructionNode)?.Node);
 
-        // next in DFS order is CN3, with a label (child of CN2)
+        // CN3 falls through to S1 (its true case), but S1 is also a jump target of CN1
         Assert.IsType<Label>(actual[4]);
-        Assert.Same(cn3, (actual[5] as IdentityInstructionNode)?.Node);
+        Assert.Same(s1, (actual[5] as IdentityInstructionNode)?.Node);
 
-        // next in DFS order is S1 (as child of CN3), with a label
+        // S2 is reached only by jumps, with a label
         Assert.IsType<Label>(actual[6]);
-        Assert.Same(s1, (actual[7] as IdentityInstructionNode)?.Node);
-
-        // next in DFS order is S2 (as child of CN3), with a label
-        Assert.IsType<Label>(actual[8]);
-        Assert.Same(s2, (actual[9] as IdentityInstructionNode)?.Node);
+        Assert.Same(s2, (actual[7] as IdentityInstructionNode)?.Node);
     }
 
     [Fact]
@@ -211,12 +206,11 @@ public class LinearizatorTest
         var linearizator = new Linearizator(mockedInstructionCovering.Object);
         var startLabel = new Label("");
 
-        var emptyOperationsList = new List<CodeTreeNode>();
 
         // s1 --
         // ^---|
 
-        var s1 = new SingleExitNode(null, emptyOperationsList);
+        var s1 = new SingleExitNode(null, operationsList);
         s1.NextTree = s1;
 
         var actual = linearizator.Linearize(s1, startLabel).ToList();
@@ -237,14 +231,13 @@ public class LinearizatorTest
         var linearizator = new Linearizator(mockedInstructionCovering.Object);
         var startLabel = new Label("");
 
-        var emptyOperationsList = new List<CodeTreeNode>();
 
         // s1 -> s2 -> s3
         //        ^----|
 
-        var s3 = new SingleExitNode(null, emptyOperationsList);
-        var s2 = new SingleExitNode(s3, emptyOperationsList);
-        var s1 = new SingleExitNode(s2, emptyOperationsList);
+        var s3 = new SingleExitNode(null, operationsList);
+        var s2 = new SingleExitNode(s3, operationsList);
+        var s1 = new SingleExitNode(s2, operationsList);
         s3.NextTree = s2;
 
         var actual = linearizator.Linearize(s1, startLabel).ToList();
@@ -262,5 +255,68 @@ public class LinearizatorTest
 
         Assert.Same(s3, (actual[4] as IdentityInstructionNode)?.Node);
     }
-}
 
+    [Fact]
+    public void TestSkipsEmptyNodes()
+    {
+        var mockedInstructionCovering = InstructionCoveringMock();
+        var linearizator = new Linearizator(mockedInstructionCovering.Object);
+        var startLabel = new Label("");
+
+        // s1 -> empty -> s2
+        // the empty node would only contain a jump to s2
+        var s2 = new SingleExitNode(null, operationsList);
+        var empty = new SingleExitNode(s2, new List<CodeTreeNode>());
+        var s1 = new SingleExitNode(empty, operationsList);
+
+        var actual = linearizator.Linearize(s1, startLabel).ToList();
+
+        Assert.Equal(3, actual.Count);
+        Assert.Same(startLabel, actual[0]);
+        Assert.Same(s1, (actual[1] as IdentityInstructionNode)?.Node);
+        Assert.Same(s2, (actual[2] as IdentityInstructionNode)?.Node);
+
+        mockedInstructionCovering.Verify(ic => ic.Cover(empty, It.IsAny<Label>()), Times.Never);
+    }
+
+    [Fact]
+    public void TestLoopContinuePathFallsThrough()
+    {
+        var mockedInstructionCovering = InstructionCoveringMock();
+        var linearizator = new Linearizator(mockedInstructionCovering.Object);
+        var startLabel = new Label("");
+        var mockedValueNode = new Mock<CodeTreeValueNode>();
+
+        // header -> condition
+        // condition: true -> exit, false -> body
+        // body -> (empty) -> header
+        var exit = new SingleExitNode(null, operationsList);
+        var header = new SingleExitNode(null, operationsList);
+        var loopStart = new SingleExitNode(header, new List<CodeTreeNode>());
+        var body = new SingleExitNode(loopStart, operationsList);
+        var condition = new ConditionalJumpNode(exit, body, mockedValueNode.Object);
+        header.NextTree = condition;
+
+        var actual = linearizator.Linearize(header, startLabel).ToList();
+
+        var numUniqueNodes = 4;
+        var numExpectedLabels = 2;
+
+        Assert.Equal(numUniqueNodes + numExpectedLabels, actual.Count);
+
+        // the loop body is placed contiguously, right after the condition
+        Assert.Same(startLabel, actual[0]);
+        Assert.Same(header, (actual[1] as IdentityInstructionNode)?.Node);
+        Assert.Same(condition, (actual[2] as IdentityInstructionNode)?.Node);
+        Assert.Same(body, (actual[3] as IdentityInstructionNode)?.Node);
+
+        // the loop exit is placed after the loop
+        Assert.IsType<Label>(actual[4]);
+        Assert.Same(exit, (actual[5] as IdentityInstructionNode)?.Node);
+
+        // the condition jumps out of the loop and falls through to the body,
+        // and the body jumps straight to the header, skipping the empty node
+        mockedInstructionCovering.Verify(ic => ic.Cover(condition, actual[4] as Label, null));
+        mockedInstructionCovering.Verify(ic => ic.Cover(body, startLabel));
+    }
+}
@@ -0,0 +1,43 @@
+namespace sernickTest.Tokenizer;
+
+using Input;
+using sernick.Input;
+using sernick.Tokenizer;
+using sernick.Utility;
+
+public class TokenBufferTest
+{
+    [Fact]
+    public void StoresTokensByIndex()
+    {
+        var buffer = new TokenBuffer<int>();
+        var first = new Range<ILocation>(new FakeLocation(), new FakeLocation());
+        var second = new Range<ILocation>(new FakeLocation(), new FakeLocation());
+
+        var firstIndex = buffer.Add(new Token<int>(1, "var", first));
+        var secondIndex = buffer.Add(new Token<int>(2, "x", second));
+
+        Assert.Equal(0, firstIndex);
+        Assert.Equal(1, secondIndex);
+        Assert.Equal(2, buffer.Count);
+        Assert.Equal(2, buffer.Category(secondIndex));
+        Assert.Equal("var", buffer.Text(firstIndex));
+        Assert.Equal(first, buffer.LocationRange(firstIndex));
+        Assert.Equal(second, buffer.LocationRange(secondIndex));
+    }
+
+    [Fact]
+    public void InternsEqualTexts()
+    {
+        var buffer = new TokenBuffer<int>();
+        var range = new Range<ILocation>(new FakeLocation(), new FakeLocation());
+
+        var first = buffer.Add(new Token<int>(1, "x", range));
+        var other = buffer.Add(new Token<int>(1, "y", range));
+        var second = buffer.Add(new Token<int>(1, new string('x', 1), range));
+
+        Assert.Equal(buffer.TextId(first), buffer.TextId(second));
+        Assert.NotEqual(buffer.TextId(first), buffer.TextId(other));
+        Assert.Equal(2, buffer.Texts.Count);
+    }
+}